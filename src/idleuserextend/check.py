@@ -0,0 +1,115 @@
+"""Idle User Extend - Check.
+
+Check if extension is registered by reading IDLE's configuration files
+directly, without importing tkinter or IDLE's GUI modules and without
+writing anything, so checking is fast.
+"""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# Idle User Extend
+# Copyright (C) 2023-2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import os
+import sys
+from configparser import ConfigParser, Error as ConfigParserError
+from importlib.util import find_spec
+
+from idleuserextend import __title__, __version__
+
+
+def get_idlelib_dir() -> str | None:
+    """Return directory of idlelib package without importing it."""
+    spec = find_spec("idlelib")
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    return next(iter(spec.submodule_search_locations))
+
+
+def get_user_cfg_dir() -> str:
+    """Return IDLE's user configuration directory without creating it.
+
+    Mirrors idlelib.config.IdleConf.GetUserCfgDir.
+    """
+    user_dir = os.path.expanduser("~")
+    if user_dir == "~" or not os.path.exists(user_dir):
+        user_dir = os.getcwd()
+    return os.path.join(user_dir, ".idlerc")
+
+
+def read_extensions_config() -> tuple[ConfigParser, ConfigParser]:
+    """Return (default, user) extensions configuration.
+
+    Missing or unreadable files result in empty configurations.
+    """
+    default = ConfigParser(interpolation=None, strict=False)
+    user = ConfigParser(interpolation=None, strict=False)
+    idlelib_dir = get_idlelib_dir()
+    for parser, path in (
+        (
+            default,
+            None
+            if idlelib_dir is None
+            else os.path.join(idlelib_dir, "config-extensions.def"),
+        ),
+        (user, os.path.join(get_user_cfg_dir(), "config-extensions.cfg")),
+    ):
+        if path is None:
+            continue
+        try:
+            # Default locale encoding, like IdleConfParser.Load
+            parser.read(path, encoding=None)
+        except (ConfigParserError, UnicodeDecodeError, OSError):
+            # IDLE ignores files it cannot parse as well
+            continue
+    return default, user
+
+
+def is_registered(default: ConfigParser, user: ConfigParser) -> bool:
+    """Return if extension is registered and enabled in configuration.
+
+    Like IDLE, extensions are enabled unless their enable option says
+    otherwise, and an invalid user value falls back to the default
+    configuration value.
+    """
+    if not (default.has_section(__title__) or user.has_section(__title__)):
+        return False
+    for parser in (user, default):
+        if parser.has_option(__title__, "enable"):
+            try:
+                return parser.getboolean(__title__, "enable")
+            except ValueError:
+                continue
+    return True
+
+
+def check_registered() -> bool:
+    """Print whether extension is registered. Return if it is."""
+    default, user = read_extensions_config()
+    if is_registered(default, user):
+        print(f"Configuration should be good! (v{__version__})")
+        return True
+    if default.has_section(__title__) or user.has_section(__title__):
+        print(f"{__title__} is registered but not enabled.")
+    else:
+        print(f"{__title__} not in system registered extensions!")
+        print(f"Run `{__title__}` to register it.")
+    return False
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(0 if check_registered() else 1)
@@ -0,0 +1,2365 @@
+"""Idle User Extend - Extension.
+
+Patches IDLE to properly load extensions from the user config file.
+"""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# Idle User Extend
+# Copyright (C) 2023-2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import atexit
+import contextlib
+import marshal
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tkinter as tk
+import weakref
+from collections import deque
+from collections.abc import Sized
+from configparser import ConfigParser
+from functools import wraps
+from idlelib.config import idleConf
+from importlib import import_module
+from types import MappingProxyType
+from typing import TYPE_CHECKING, ClassVar, NamedTuple
+
+from idleuserextend import __author__, __title__, __version__
+
+if TYPE_CHECKING:
+    from collections.abc import (
+        Callable,
+        Generator,
+        Iterable,
+        Mapping,
+        Sequence,
+    )
+    from idlelib.config import IdleConfParser, IdleUserConfParser
+    from idlelib.pyshell import PyShellEditorWindow
+    from importlib.abc import Loader
+    from importlib.machinery import ModuleSpec
+    from tkinter import Menu
+    from types import ModuleType
+
+
+def check_installed() -> bool:
+    """Make sure extension installed.
+
+    With --stats command line option, also print call and cache
+    statistics of startup configuration loading.
+    """
+    show_stats = "--stats" in sys.argv[1:]
+    if show_stats:
+        enable_stats()
+
+    # Make sure configuration for this extension exists
+    ensure_initialized()
+
+    if show_stats:
+        # Look up bindings of every extension like opening a window does
+        idleConf.GetCurrentKeySet()
+        for extension in idleConf.GetExtensions(editor_only=True):
+            idleConf.GetExtensionBindings(extension)
+        print(format_stats())
+
+    # Get list of system extensions
+    extensions = set(idleConf.defaultCfg["extensions"]) | set(
+        idleConf.userCfg["extensions"],
+    )
+
+    # Import this extension (this file),
+    module = __import__(__title__)
+
+    # Get extension class
+    if not hasattr(module, __title__):
+        print(
+            f"ERROR: Somehow, {__title__} was installed improperly, "
+            f"no {__title__} class found in module. Please report "
+            "this on github.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    # If this extension not in there,
+    if __title__ not in extensions:
+        # Tell user how to add it to system list.
+        print(f"{__title__} not in system registered extensions!")
+        print("This should not be possible! If you see this message,")
+        print("please report this issue on Github!")
+    else:
+        print(f"Configuration should be good! (v{__version__})")
+        return True
+    return False
+
+
+def ensure_section_exists(section: str) -> bool:
+    """Ensure section exists in user extensions configuration.
+
+    Returns True if edited.
+    """
+    if section not in idleConf.GetSectionList("user", "extensions"):
+        idleConf.userCfg["extensions"].AddSection(section)
+        return True
+    return False
+
+
+def ensure_values_exist_in_section(
+    section: str,
+    values: Mapping[str, str | None],
+) -> bool:
+    """For each key in values, make sure key exists. Return if edited.
+
+    If key does not exist and default value is not None, create and set
+    to value.
+    """
+    need_save = False
+    options = get_merged_section(section)
+    for key, default in values.items():
+        if key not in options and default is not None:
+            idleConf.SetOption("extensions", section, key, default)
+            need_save = True
+    return need_save
+
+
+def get_mangled(obj: object, attribute: str) -> str:
+    """Get mangled attribute name for object."""
+    if attribute.endswith("__"):
+        return attribute
+    if not attribute.startswith("__"):
+        return attribute
+    return f"_{obj.__class__.__name__}{attribute}"
+
+
+def yield_string_entries(
+    iterable: Iterable[object],
+) -> Generator[str, None, None]:
+    """Yield string entries from an iterable."""
+    for entry in iterable:
+        if isinstance(entry, str):
+            yield entry
+
+
+def unwrap_attribute(obj: object, attr_name: str) -> bool:
+    """Unwrap attribute on object if it is wrapped. Return if unwrapped."""
+    attribute = getattr(obj, attr_name)
+    wrapped = getattr(attribute, "__wrapped__", None)
+    if wrapped is None:
+        return False
+    setattr(obj, attr_name, wrapped)
+    return True
+
+
+# Incremented whenever loaded configuration might have changed,
+# invalidating everything cached for an older generation.
+_config_generation = 0
+
+# Extension name -> (generation, {event: key sequences})
+_extension_keys_cache: dict[str, tuple[int, dict[str, tuple[str, ...]]]] = {}
+_extension_bindings_cache: dict[
+    str,
+    tuple[int, dict[str, tuple[str, ...]]],
+] = {}
+
+
+def get_config_generation() -> int:
+    """Return the current configuration generation counter."""
+    return _config_generation
+
+
+def bump_config_generation() -> int:
+    """Invalidate cached configuration results. Return new generation."""
+    global _config_generation
+    _config_generation += 1
+    return _config_generation
+
+
+def freeze_bindings(
+    bindings: Mapping[str, Iterable[str]],
+) -> dict[str, tuple[str, ...]]:
+    """Return copy of bindings with immutable key sequence tuples."""
+    return {event: tuple(keys) for event, keys in bindings.items()}
+
+
+def thaw_bindings(
+    bindings: Mapping[str, Iterable[str]],
+) -> dict[str, list[str]]:
+    """Return copy of bindings that callers are free to modify."""
+    return {event: list(keys) for event, keys in bindings.items()}
+
+
+# Section name -> (generation, {option : value})
+_merged_section_cache: dict[str, tuple[int, dict[str, str]]] = {}
+
+
+def read_section(parser: IdleConfParser, section: str) -> dict[str, str]:
+    """Return {option : value} of section in parser, empty if missing.
+
+    Values are not interpolated, so one option with a stray % sign
+    does not make the whole section unreadable.
+    """
+    if not parser.has_section(section):
+        return {}
+    return dict(parser.items(section, raw=True))
+
+
+def get_merged_section(section: str) -> dict[str, str]:
+    """Return {option : value} of extensions configuration section.
+
+    User configuration values replace default ones, like
+    idleConf.GetOption, but the whole section is resolved at once
+    instead of searching both configurations for every option.
+    Resolved once per configuration generation. Do not modify, result
+    is shared.
+    """
+    cached = _merged_section_cache.get(section)
+    hit = cached is not None and cached[0] == _config_generation
+    if _stats_enabled:
+        record_cache_lookup("get_merged_section", hit)
+    if hit:
+        assert cached is not None
+        return cached[1]
+    generation = _config_generation
+    options = read_section(idleConf.defaultCfg["extensions"], section)
+    options.update(read_section(idleConf.userCfg["extensions"], section))
+    _merged_section_cache[section] = (generation, options)
+    return options
+
+
+def get_cached_bindings(
+    cache: dict[str, tuple[int, dict[str, tuple[str, ...]]]],
+    extension: str,
+) -> dict[str, list[str]] | None:
+    """Return copy of cached bindings for extension or None if stale."""
+    cached = cache.get(extension)
+    if cached is None:
+        return None
+    generation, bindings = cached
+    if generation != _config_generation:
+        return None
+    return thaw_bindings(bindings)
+
+
+class CallStats:
+    """Call and cache statistics recorded for an instrumented function."""
+
+    __slots__ = (
+        "cache_hits",
+        "cache_misses",
+        "calls",
+        "max_time",
+        "total_time",
+    )
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __repr__(self) -> str:
+        """Return representation of self."""
+        return (
+            f"{self.__class__.__name__}(calls={self.calls}, "
+            f"total_time={self.total_time}, max_time={self.max_time}, "
+            f"cache_hits={self.cache_hits}, "
+            f"cache_misses={self.cache_misses})"
+        )
+
+    def copy(self) -> CallStats:
+        """Return copy of these statistics."""
+        copy = CallStats()
+        copy.calls = self.calls
+        copy.total_time = self.total_time
+        copy.max_time = self.max_time
+        copy.cache_hits = self.cache_hits
+        copy.cache_misses = self.cache_misses
+        return copy
+
+    @property
+    def hit_rate(self) -> float | None:
+        """Fraction of cache lookups that were hits, None if no lookups."""
+        lookups = self.cache_hits + self.cache_misses
+        if not lookups:
+            return None
+        return self.cache_hits / lookups
+
+
+class TraceEvent(NamedTuple):
+    """Call recorded by the tracer."""
+
+    name: str
+    category: str
+    # time.perf_counter() when call started, in seconds
+    start: float
+    # Wall time call took, in seconds
+    duration: float
+    thread: int
+    # Window identity, extension name, result size, configuration
+    # generation and such, depending on call
+    details: dict[str, object]
+
+
+# Default number of trace events kept, older events are dropped
+TRACE_BUFFER_SIZE = 10_000
+
+# Whether call and cache statistics are being recorded
+_stats_enabled = False
+# Function name -> recorded statistics
+_stats: dict[str, CallStats] = {}
+# Whether calls are being traced
+_trace_enabled = False
+# Most recent trace events, oldest first
+_trace_events: deque[TraceEvent] = deque(maxlen=TRACE_BUFFER_SIZE)
+# (object, attribute name, uninstrumented value) for installed timers
+_stats_patched: list[tuple[object, str, object]] = []
+
+
+def get_call_stats(name: str) -> CallStats:
+    """Return statistics being recorded for name, creating if needed."""
+    stats = _stats.get(name)
+    if stats is None:
+        stats = _stats[name] = CallStats()
+    return stats
+
+
+def record_cache_lookup(name: str, hit: bool) -> None:
+    """Record cache hit or miss for name.
+
+    Callers check _stats_enabled first so disabled stats cost nothing.
+    """
+    stats = get_call_stats(name)
+    if hit:
+        stats.cache_hits += 1
+    else:
+        stats.cache_misses += 1
+
+
+def describe_call(
+    category: str,
+    args: tuple[object, ...],
+    result: object,
+) -> dict[str, object]:
+    """Return trace details of call with args that returned result."""
+    details: dict[str, object] = {}
+    if category == "window" and args:
+        details["window"] = id(args[0])
+        for arg in args[1:]:
+            if isinstance(arg, BindingDelta):
+                details["added"] = len(arg.added)
+                details["removed"] = len(arg.removed)
+            elif isinstance(arg, Sized):
+                details["events"] = len(arg)
+    elif args and isinstance(args[0], str):
+        details["extension"] = args[0]
+    elif args:
+        # Config parsers
+        file = getattr(args[0], "file", None)
+        if isinstance(file, str):
+            details["file"] = file
+    if isinstance(result, Sized) and not isinstance(result, str):
+        details["size"] = len(result)
+    details["generation"] = _config_generation
+    return details
+
+
+def time_calls(
+    name: str,
+    function: Callable[..., object],
+    category: str = "config",
+) -> Callable[..., object]:
+    """Wrap function to record call count and wall time as name.
+
+    Calls are also traced under category while tracing is enabled.
+    """
+
+    # [misc] Type of decorated function contains type "Any"
+    @wraps(function)
+    def wrapper(*args: object, **kwargs: object) -> object:  # type: ignore[misc]
+        start = time.perf_counter()
+        result: object = None
+        try:
+            result = function(*args, **kwargs)
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            if _stats_enabled:
+                stats = get_call_stats(name)
+                stats.calls += 1
+                stats.total_time += elapsed
+                stats.max_time = max(stats.max_time, elapsed)
+            if _trace_enabled:
+                _trace_events.append(
+                    TraceEvent(
+                        name,
+                        category,
+                        start,
+                        elapsed,
+                        threading.get_ident(),
+                        describe_call(category, args, result),
+                    ),
+                )
+
+    return wrapper
+
+
+def get_stats() -> dict[str, CallStats]:
+    """Return copy of recorded {function name : statistics}."""
+    return {name: stats.copy() for name, stats in _stats.items()}
+
+
+def reset_stats() -> None:
+    """Forget all recorded statistics."""
+    _stats.clear()
+
+
+def format_stats() -> str:
+    """Return recorded statistics as a human readable table."""
+    header = (
+        f"{'function':<40} {'calls':>7} {'total ms':>10} "
+        f"{'max ms':>9} {'cache hit':>9}"
+    )
+    lines = [header]
+    for name, stats in sorted(_stats.items()):
+        hit_rate = stats.hit_rate
+        lines.append(
+            f"{name:<40} {stats.calls:>7} "
+            f"{stats.total_time * 1000:>10.3f} "
+            f"{stats.max_time * 1000:>9.3f} "
+            f"{'-' if hit_rate is None else f'{hit_rate:.1%}':>9}",
+        )
+    return "\n".join(lines)
+
+
+# Config type -> sections changed since user config file was last saved
+_dirty_sections: dict[str, set[str]] = {}
+# Nesting level of batch_saves, saves are deferred while above zero
+_save_batch_depth = 0
+# Whether SaveUserCfgFiles was called while saves were deferred
+_save_pending = False
+
+
+def mark_section_dirty(config_type: str, section: str) -> None:
+    """Record that section of user config_type configuration changed."""
+    _dirty_sections.setdefault(config_type, set()).add(section)
+    bump_config_generation()
+
+
+def get_dirty_sections() -> dict[str, frozenset[str]]:
+    """Return {config type : sections changed since last save}."""
+    return {
+        config_type: frozenset(sections)
+        for config_type, sections in _dirty_sections.items()
+        if sections
+    }
+
+
+def track_section_changes(
+    config_type: str,
+    method: Callable[..., object],
+) -> Callable[..., object]:
+    """Wrap config parser method to mark its section argument dirty.
+
+    Returning False from method means nothing was changed.
+    """
+
+    # [misc] Type of decorated function contains type "Any"
+    @wraps(method)
+    def wrapper(  # type: ignore[misc]
+        section: str,
+        *args: object,
+        **kwargs: object,
+    ) -> object:
+        result = method(section, *args, **kwargs)
+        if result is not False:
+            mark_section_dirty(config_type, section)
+        return result
+
+    return wrapper
+
+
+def get_umask() -> int:
+    """Return file mode creation mask of process."""
+    # Only way to read it is to set it
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+def write_user_parser(parser: IdleUserConfParser) -> None:
+    """Update user configuration file without risking a truncated file.
+
+    Same as IdleUserConfParser.Save, but writes to a temporary file
+    in the same directory first and then renames it over the original.
+    """
+    fname = parser.file
+    if not fname or fname[0] == "#":
+        return
+    if parser.IsEmpty():
+        if os.path.exists(fname):
+            os.remove(fname)
+        return
+    # Replace symbolic link target, not the link
+    fname = os.path.realpath(fname)
+    directory, basename = os.path.split(fname)
+    handle, temp_name = tempfile.mkstemp(
+        prefix=f".{basename}.",
+        suffix=".tmp",
+        dir=directory,
+        text=True,
+    )
+    try:
+        with os.fdopen(handle, "w") as cfg_file:
+            parser.write(cfg_file)
+            cfg_file.flush()
+            os.fsync(cfg_file.fileno())
+        if os.path.exists(fname):
+            shutil.copymode(fname, temp_name)
+        else:
+            # mkstemp creates files only the owner can read, use the
+            # mode open would have given a new file instead.
+            os.chmod(temp_name, 0o666 & ~get_umask())
+        os.replace(temp_name, fname)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp_name)
+        raise
+
+
+def atomic_save(
+    config_type: str,
+    parser: IdleUserConfParser,
+) -> Callable[[], None]:
+    """Return replacement Save method for parser that writes atomically."""
+
+    @wraps(parser.Save)
+    def save() -> None:
+        """Update user configuration file."""
+        write_user_parser(parser)
+        _dirty_sections.pop(config_type, None)
+        # File now matches what is loaded, no need to load it again
+        _loaded_file_signatures[parser.file] = get_file_signature(parser.file)
+
+    return save
+
+
+def patch_user_parser(config_type: str, parser: IdleUserConfParser) -> None:
+    """Track user config parser modifications and make saving atomic.
+
+    Modifications mark the changed section dirty and bump the
+    configuration generation.
+    """
+    for name in ("set", "remove_option", "add_section", "remove_section"):
+        setattr(
+            parser,
+            name,
+            track_section_changes(config_type, getattr(parser, name)),
+        )
+    parser.Save = atomic_save(config_type, parser)  # type: ignore[method-assign]
+
+
+def unpatch_user_parser(parser: IdleUserConfParser) -> None:
+    """Undo patch_user_parser."""
+    for name in (
+        "set",
+        "remove_option",
+        "add_section",
+        "remove_section",
+        "Save",
+    ):
+        unwrap_attribute(parser, name)
+
+
+def flush_user_cfg_saves() -> None:
+    """Write user configuration files that have unsaved changes."""
+    global _save_pending
+    _save_pending = False
+    for config_type in tuple(_dirty_sections):
+        if _dirty_sections[config_type]:
+            idleConf.userCfg[config_type].Save()
+
+
+def flush_pending_saves() -> None:
+    """Write user configuration files if a deferred save was requested."""
+    if _save_pending:
+        flush_user_cfg_saves()
+
+
+@contextlib.contextmanager
+def batch_saves() -> Generator[None, None, None]:
+    """Coalesce SaveUserCfgFiles calls into one save at end of batch.
+
+    Batches can be nested, saving happens when leaving the outermost.
+    """
+    global _save_batch_depth
+    _save_batch_depth += 1
+    try:
+        yield
+    finally:
+        _save_batch_depth -= 1
+        if not _save_batch_depth:
+            flush_pending_saves()
+
+
+for _config_type, _user_parser in idleConf.userCfg.items():
+    patch_user_parser(_config_type, _user_parser)
+
+
+class ExtensionBindingInfo(NamedTuple):
+    """Indexed key binding configuration for one extension."""
+
+    # Configurable event name -> keys, user config over default config
+    cfg_bindings: dict[str, tuple[str, ...]]
+    # Event names defined in default config extension_bindings section
+    default_events: frozenset[str]
+    # Event names only defined in user config extension_bindings section
+    user_events: frozenset[str]
+    # Non-configurable event name -> keys, user config over default config
+    bindings: dict[str, tuple[str, ...]]
+
+
+EMPTY_BINDING_INFO = ExtensionBindingInfo({}, frozenset(), frozenset(), {})
+
+_binding_index: dict[str, ExtensionBindingInfo] = {}
+_binding_index_generation = -1
+
+
+def build_binding_index() -> dict[str, ExtensionBindingInfo]:
+    """Return extension binding index built from loaded configuration.
+
+    Makes a single pass over the sections of the default and then the
+    user extensions configuration, so user values replace default ones.
+    """
+    cfg_bindings: dict[str, dict[str, tuple[str, ...]]] = {}
+    bindings: dict[str, dict[str, tuple[str, ...]]] = {}
+    default_events: dict[str, set[str]] = {}
+    user_events: dict[str, set[str]] = {}
+
+    for parser, event_names in (
+        (idleConf.defaultCfg["extensions"], default_events),
+        (idleConf.userCfg["extensions"], user_events),
+    ):
+        for section in parser.sections():
+            if section.endswith("_cfgBindings"):
+                extension = section.removesuffix("_cfgBindings")
+                keys = cfg_bindings.setdefault(extension, {})
+            elif section.endswith("_bindings"):
+                extension = section.removesuffix("_bindings")
+                keys = bindings.setdefault(extension, {})
+                event_names.setdefault(extension, set()).update(
+                    parser.options(section),
+                )
+            else:
+                continue
+            for event_name in parser.options(section):
+                keys[event_name] = tuple(
+                    parser.get(section, event_name, raw=True).split(),
+                )
+
+    index: dict[str, ExtensionBindingInfo] = {}
+    for extension in cfg_bindings.keys() | bindings.keys():
+        defaults = frozenset(default_events.get(extension, ()))
+        index[extension] = ExtensionBindingInfo(
+            cfg_bindings=cfg_bindings.get(extension, {}),
+            default_events=defaults,
+            user_events=frozenset(user_events.get(extension, ())) - defaults,
+            bindings=bindings.get(extension, {}),
+        )
+    return index
+
+
+# Version of binding snapshot cache format, change when format changes
+SNAPSHOT_CACHE_VERSION = 1
+
+
+def get_snapshot_cache_path() -> str | None:
+    """Return path of binding snapshot cache file or None if unknown."""
+    userdir: str = getattr(idleConf, "userdir", "")
+    if not userdir:
+        return None
+    return os.path.join(userdir, f"{__title__}-cache.marshal")
+
+
+def hash_file(path: str) -> bytes | None:
+    """Return hash of contents of file or None if it cannot be read."""
+    # Imported here as it is only needed when the cache is out of date
+    import hashlib
+
+    try:
+        with open(path, "rb") as file:
+            return hashlib.blake2b(file.read()).digest()
+    except (OSError, ValueError):
+        return None
+
+
+def get_snapshot_sources() -> (
+    tuple[tuple[str, tuple[int, int, int] | None], ...] | None
+):
+    """Return (path, signature) of loaded extension configuration files.
+
+    Return None if loaded configuration might differ from the files.
+    """
+    if _dirty_sections.get("extensions"):
+        return None
+    sources: list[tuple[str, tuple[int, int, int] | None]] = []
+    for cfg in (idleConf.defaultCfg, idleConf.userCfg):
+        path = cfg["extensions"].file
+        if path not in _loaded_file_signatures:
+            return None
+        sources.append((path, _loaded_file_signatures[path]))
+    return tuple(sources)
+
+
+def save_binding_snapshot(
+    index: Mapping[str, ExtensionBindingInfo],
+    sources: Sequence[tuple[str, tuple[int, int, int] | None]],
+) -> bool:
+    """Write binding index to snapshot cache file. Return if written.
+
+    Not written if a source file changed since it was loaded.
+    """
+    cache_path = get_snapshot_cache_path()
+    if cache_path is None:
+        return False
+    entries = []
+    for path, signature in sources:
+        if get_file_signature(path) != signature:
+            return False
+        entries.append(
+            (path, signature, None if signature is None else hash_file(path)),
+        )
+    data = marshal.dumps(
+        (
+            SNAPSHOT_CACHE_VERSION,
+            sys.implementation.cache_tag,
+            tuple(entries),
+            {extension: tuple(info) for extension, info in index.items()},
+        ),
+    )
+    directory, basename = os.path.split(cache_path)
+    try:
+        handle, temp_name = tempfile.mkstemp(
+            prefix=f".{basename}.",
+            suffix=".tmp",
+            dir=directory,
+        )
+        try:
+            with os.fdopen(handle, "wb") as cache_file:
+                cache_file.write(data)
+            os.replace(temp_name, cache_path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(temp_name)
+            raise
+    except OSError:
+        return False
+    return True
+
+
+def load_binding_snapshot(
+    sources: Sequence[tuple[str, tuple[int, int, int] | None]],
+) -> dict[str, ExtensionBindingInfo] | None:
+    """Return binding index from snapshot cache file for sources.
+
+    Return None if cache is missing, corrupt, or for other files.
+    Files with a different signature but the same contents as when
+    the cache was written are still accepted.
+    """
+    cache_path = get_snapshot_cache_path()
+    if cache_path is None:
+        return None
+    try:
+        with open(cache_path, "rb") as cache_file:
+            # Only as trusted as the configuration files next to it
+            version, cache_tag, entries, cached_index = marshal.load(  # noqa: S302
+                cache_file,
+            )
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if (
+        version != SNAPSHOT_CACHE_VERSION
+        or cache_tag != sys.implementation.cache_tag
+        or not isinstance(entries, tuple)
+        or not isinstance(cached_index, dict)
+        or len(entries) != len(sources)
+    ):
+        return None
+    revalidated = False
+    for (path, signature), entry in zip(sources, entries):
+        if not isinstance(entry, tuple) or len(entry) != 3:
+            return None
+        cached_path, cached_signature, cached_hash = entry
+        if path != cached_path:
+            return None
+        if signature == cached_signature:
+            continue
+        # Signature changes when file is touched or copied, compare content
+        if (
+            signature is None
+            or cached_hash is None
+            or get_file_signature(path) != signature
+            or hash_file(path) != cached_hash
+        ):
+            return None
+        revalidated = True
+    try:
+        index = {
+            extension: ExtensionBindingInfo(*info)
+            for extension, info in cached_index.items()
+        }
+    except TypeError:
+        return None
+    if revalidated:
+        save_binding_snapshot(index, sources)
+    return index
+
+
+def rebuild_binding_index() -> None:
+    """Rebuild extension binding index for current configuration.
+
+    Loaded from snapshot cache file if configuration files did not
+    change since it was written, otherwise built and cached.
+    """
+    global _binding_index, _binding_index_generation
+    generation = _config_generation
+    sources = get_snapshot_sources()
+    index = None if sources is None else load_binding_snapshot(sources)
+    if index is None:
+        index = build_binding_index()
+        if sources is not None:
+            save_binding_snapshot(index, sources)
+    _binding_index = index
+    _binding_index_generation = generation
+
+
+def get_binding_info(extension: str) -> ExtensionBindingInfo:
+    """Return indexed key binding configuration for extension.
+
+    Index is rebuilt first if configuration changed since it was built.
+    """
+    stale = _binding_index_generation != _config_generation
+    if _stats_enabled:
+        record_cache_lookup("get_binding_info", not stale)
+    if stale:
+        rebuild_binding_index()
+    return _binding_index.get(extension, EMPTY_BINDING_INFO)
+
+
+# [misc] Type of decorated function contains type "Any"
+@wraps(getattr(idleConf, get_mangled(idleConf, "__GetRawExtensionKeys")))
+def get_raw_extension_keys(extension: str) -> dict[str, list[str]]:  # type: ignore[misc]
+    """Return dict {configurable extension event : keybinding list}.
+
+    Events come from default and user config extension_cfgBindings
+    sections. Keybindings list come from the splitting of the option,
+    preferring user config over default config.
+    """
+    return {
+        f"<<{event_name}>>": list(keys)
+        for event_name, keys in get_binding_info(
+            extension,
+        ).cfg_bindings.items()
+    }
+
+
+setattr(
+    idleConf,
+    get_mangled(idleConf, "__GetRawExtensionKeys"),
+    get_raw_extension_keys,
+)
+
+
+@wraps(idleConf.GetExtensionKeys)
+def get_extension_keys(extension: str) -> dict[str, list[str]]:
+    """Return dict: {configurable extension event : active keybinding}.
+
+    Events come from default config extension_cfgBindings section.
+    Keybindings come from get_shared_keyset() active key mapping,
+    where previously used bindings are disabled.
+    """
+    cached = get_cached_bindings(_extension_keys_cache, extension)
+    if _stats_enabled:
+        record_cache_lookup("get_extension_keys", cached is not None)
+    if cached is not None:
+        return cached
+
+    generation = _config_generation
+    current_keyset = get_shared_keyset()
+    extension_keys: dict[str, list[str]] = {}
+
+    for event_name in get_binding_info(extension).cfg_bindings:
+        event = f"<<{event_name}>>"
+        binding = current_keyset.get(event, None)
+        if binding is None:
+            continue
+        extension_keys[event] = list(binding)
+    _extension_keys_cache[extension] = (
+        generation,
+        freeze_bindings(extension_keys),
+    )
+    return extension_keys
+
+
+idleConf.GetExtensionKeys = get_extension_keys  # type: ignore[method-assign,assignment]
+
+
+@wraps(idleConf.GetExtensionBindings)
+def get_extension_bindings(extension: str) -> dict[str, list[str]]:
+    """Return dict {extension event : active or defined keybinding}."""
+    cached = get_cached_bindings(_extension_bindings_cache, extension)
+    if _stats_enabled:
+        record_cache_lookup("get_extension_bindings", cached is not None)
+    if cached is not None:
+        return cached
+
+    generation = _config_generation
+    extension_bindings: dict[str, list[str]] = idleConf.GetExtensionKeys(
+        extension,
+    )
+    # add the non-configurable bindings
+    for event_name, keys in get_binding_info(extension).bindings.items():
+        extension_bindings[f"<<{event_name}>>"] = list(keys)
+    _extension_bindings_cache[extension] = (
+        generation,
+        freeze_bindings(extension_bindings),
+    )
+    return extension_bindings
+
+
+idleConf.GetExtensionBindings = get_extension_bindings  # type: ignore[method-assign,assignment]
+
+
+# Extensions idlelib mainlined, configuration is only kept for
+# backward compatibility so GetExtensions leaves them out
+MAINLINED_EXTENSIONS = frozenset(
+    {"AutoComplete", "CodeContext", "FormatParagraph", "ParenMatch"},
+)
+
+
+class ExtensionRegistry(NamedTuple):
+    """Extensions in configuration and the contexts they are enabled in."""
+
+    # All extensions, default config order followed by user added ones
+    extensions: tuple[str, ...]
+    # Enabled extensions
+    active: tuple[str, ...]
+    # Enabled extensions that are also enabled for editor windows
+    editor: tuple[str, ...]
+    # Enabled extensions that are also enabled for the shell
+    shell: tuple[str, ...]
+
+
+_extension_registry = ExtensionRegistry((), (), (), ())
+_extension_registry_generation = -1
+
+
+def get_extension_flag(extension: str, option: str) -> bool:
+    """Return boolean enable option of extension, True if not set.
+
+    Like idleConf.GetOption, an invalid user value falls back to the
+    default configuration value.
+    """
+    for parser in (
+        idleConf.userCfg["extensions"],
+        idleConf.defaultCfg["extensions"],
+    ):
+        if parser.has_option(extension, option):
+            with contextlib.suppress(ValueError):
+                return parser.getboolean(extension, option)
+    return True
+
+
+def build_extension_registry() -> ExtensionRegistry:
+    """Return extension registry built from loaded configuration."""
+    extensions: dict[str, None] = {}
+    for parser in (
+        idleConf.defaultCfg["extensions"],
+        idleConf.userCfg["extensions"],
+    ):
+        for section in parser.sections():
+            if section.endswith(("_bindings", "_cfgBindings")):
+                continue
+            if section not in MAINLINED_EXTENSIONS:
+                extensions[section] = None
+
+    active: list[str] = []
+    editor: list[str] = []
+    shell: list[str] = []
+    for extension in extensions:
+        if not get_extension_flag(extension, "enable"):
+            continue
+        active.append(extension)
+        if get_extension_flag(extension, "enable_editor"):
+            editor.append(extension)
+        if get_extension_flag(extension, "enable_shell"):
+            shell.append(extension)
+    return ExtensionRegistry(
+        extensions=tuple(extensions),
+        active=tuple(active),
+        editor=tuple(editor),
+        shell=tuple(shell),
+    )
+
+
+def get_extension_registry() -> ExtensionRegistry:
+    """Return extension registry, built once per configuration generation."""
+    global _extension_registry, _extension_registry_generation
+    stale = _extension_registry_generation != _config_generation
+    if _stats_enabled:
+        record_cache_lookup("get_extension_registry", not stale)
+    if stale:
+        generation = _config_generation
+        _extension_registry = build_extension_registry()
+        _extension_registry_generation = generation
+    return _extension_registry
+
+
+@wraps(idleConf.GetExtensions)
+def get_extensions(
+    active_only: bool = True,
+    editor_only: bool = False,
+    shell_only: bool = False,
+) -> list[str]:
+    """Return extensions in default and user config-extensions files.
+
+    If active_only True, only return active (enabled) extensions
+    and optionally only editor or shell extensions.
+    If active_only False, return all extensions.
+    """
+    registry = get_extension_registry()
+    if not active_only:
+        return list(registry.extensions)
+    if editor_only:
+        return list(registry.editor)
+    if shell_only:
+        return list(registry.shell)
+    return list(registry.active)
+
+
+idleConf.GetExtensions = get_extensions  # type: ignore[method-assign]
+
+
+def get_user_added_extension_bindings(extension: str) -> dict[str, list[str]]:
+    """Return dict {extension event : active or defined keybinding}."""
+    info = get_binding_info(extension)
+    extension_keys: dict[str, list[str]] = idleConf.GetExtensionKeys(extension)
+    # add the non-configurable bindings only user config defines
+    for event_name in info.user_events:
+        extension_keys[f"<<{event_name}>>"] = list(info.bindings[event_name])
+    return extension_keys
+
+
+# Config file path -> file signature when last loaded
+_loaded_file_signatures: dict[str, tuple[int, int, int] | None] = {}
+
+
+def get_file_signature(path: str) -> tuple[int, int, int] | None:
+    """Return (mtime, size, inode) of file or None if it cannot be read."""
+    try:
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def load_parser(parser: IdleConfParser, force: bool = False) -> bool:
+    """Load parser if its file changed since it was last loaded.
+
+    If force is True, load even if file is unchanged.
+    Return True if parser was loaded.
+    """
+    signature = get_file_signature(parser.file)
+    unchanged = (
+        not force
+        and parser.file in _loaded_file_signatures
+        and _loaded_file_signatures[parser.file] == signature
+    )
+    if _stats_enabled:
+        record_cache_lookup("load_parser", unchanged)
+    if unchanged:
+        return False
+    # Loading merges into existing sections, clear so options removed
+    # from file are removed too. Unbound methods skip change tracking.
+    for section in parser.sections():
+        ConfigParser.remove_section(parser, section)
+    parser.Load()
+    _loaded_file_signatures[parser.file] = signature
+    return True
+
+
+def record_loaded_signatures() -> None:
+    """Record current file signatures of all configuration files.
+
+    Used at import, as IDLE loaded every configuration file just before.
+    """
+    for cfg in (idleConf.defaultCfg, idleConf.userCfg):
+        for parser in cfg.values():
+            _loaded_file_signatures.setdefault(
+                parser.file,
+                get_file_signature(parser.file),
+            )
+
+
+@wraps(idleConf.LoadCfgFiles)
+def load_cfg_files(force: bool = False) -> None:
+    """Load configuration files that changed since they were last loaded.
+
+    If force is True, load all configuration files, discarding unsaved
+    changes to user configuration.
+    """
+    loaded = False
+    for key in idleConf.defaultCfg:
+        if load_parser(idleConf.defaultCfg[key], force):
+            loaded = True
+    # might have different keys hence patching
+    for key in idleConf.userCfg:
+        # Loading would discard changes not saved yet
+        if _dirty_sections.get(key) and not force:
+            continue
+        if load_parser(idleConf.userCfg[key], force):
+            _dirty_sections.pop(key, None)
+            loaded = True
+    if loaded:
+        bump_config_generation()
+        rebuild_binding_index()
+
+
+idleConf.LoadCfgFiles = load_cfg_files  # type: ignore[method-assign]
+record_loaded_signatures()
+
+
+@wraps(idleConf.SaveUserCfgFiles)
+def save_user_cfg_files() -> None:
+    """Write user configuration files that have unsaved changes to disk.
+
+    Inside batch_saves, writing is deferred until the batch ends.
+    """
+    global _save_pending
+    _save_pending = True
+    if _save_batch_depth:
+        return
+    flush_user_cfg_saves()
+
+
+idleConf.SaveUserCfgFiles = save_user_cfg_files  # type: ignore[method-assign]
+
+
+class OptionSchema(NamedTuple):
+    """Inferred type and default value of an extension option."""
+
+    name: str
+    # "bool", "int", or None for string options
+    type: str | None
+    # Raw string value, user config over default config
+    default: str
+    # Default parsed according to type
+    value: bool | int | str
+    # "user" or "default", whichever config default came from
+    source: str
+    # Raw string value in default config, None if not defined there
+    config_default: str | None
+
+
+BOOL_OPTION_VALUES = {"True": True, "False": False}
+INT_OPTION_PATTERN = re.compile(r"\s*[+-]?\d+(?:_\d+)*\s*")
+
+# Extension name -> (generation, {option name : schema})
+_option_schema_cache: dict[str, tuple[int, dict[str, OptionSchema]]] = {}
+
+
+def infer_option_type(raw: str) -> tuple[str | None, bool | int | str]:
+    """Return (type, parsed value) for raw option string."""
+    if raw in BOOL_OPTION_VALUES:
+        return "bool", BOOL_OPTION_VALUES[raw]
+    if INT_OPTION_PATTERN.fullmatch(raw):
+        return "int", int(raw)
+    return None, raw
+
+
+def build_option_schema(ext_name: str) -> dict[str, OptionSchema]:
+    """Return {option name : schema} for options of extension.
+
+    Options are sorted by name with 'enable' options first.
+    """
+    default_cfg = idleConf.defaultCfg["extensions"]
+    user_cfg = idleConf.userCfg["extensions"]
+    default = set(default_cfg.GetOptionList(ext_name))
+    user = set(user_cfg.GetOptionList(ext_name))
+    opt_list = sorted(yield_string_entries(default | user))
+
+    # Bring 'enable' options to the beginning of the list.
+    enables = [
+        opt_name for opt_name in opt_list if opt_name.startswith("enable")
+    ]
+    others = [
+        opt_name for opt_name in opt_list if not opt_name.startswith("enable")
+    ]
+
+    schema: dict[str, OptionSchema] = {}
+    for opt_name in enables + others:
+        config_default: str | None = None
+        if opt_name in default:
+            config_default = default_cfg.get(ext_name, opt_name, raw=True)
+        if opt_name in user:
+            source = "user"
+            raw = user_cfg.get(ext_name, opt_name, raw=True)
+        else:
+            source = "default"
+            raw = str(config_default)
+        opt_type, value = infer_option_type(raw)
+        schema[opt_name] = OptionSchema(
+            name=opt_name,
+            type=opt_type,
+            default=raw,
+            value=value,
+            source=source,
+            config_default=config_default,
+        )
+    return schema
+
+
+def get_option_schema(ext_name: str) -> dict[str, OptionSchema]:
+    """Return {option name : schema} for extension, cached per generation.
+
+    Do not modify, result is shared.
+    """
+    cached = _option_schema_cache.get(ext_name)
+    hit = cached is not None and cached[0] == _config_generation
+    if _stats_enabled:
+        record_cache_lookup("get_option_schema", hit)
+    if hit:
+        assert cached is not None
+        return cached[1]
+    generation = _config_generation
+    schema = build_option_schema(ext_name)
+    _option_schema_cache[ext_name] = (generation, schema)
+    return schema
+
+
+CONFIGDIALOG_MODULE = "idlelib.configdialog"
+
+
+def install_ext_page_patch() -> None:
+    """Replace ExtPage of idlelib.configdialog with patched subclass.
+
+    Importing idleuserextend.extpage installs the patch.
+    """
+    import_module(f"{__package__}.extpage")
+
+
+class PatchingLoader:
+    """Loader that installs ExtPage patch after loading configdialog."""
+
+    __slots__ = ("loader",)
+
+    def __init__(self, loader: Loader) -> None:
+        """Initialize wrapping loader."""
+        self.loader = loader
+
+    def __getattr__(self, name: str) -> object:
+        """Return attribute of wrapped loader."""
+        return getattr(self.loader, name)
+
+    def create_module(self, spec: ModuleSpec) -> ModuleType | None:
+        """Return module created by wrapped loader."""
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType) -> None:
+        """Execute module with wrapped loader, then patch it."""
+        self.loader.exec_module(module)
+        remove_ext_page_hook()
+        install_ext_page_patch()
+
+
+class ConfigDialogImportHook:
+    """Meta path finder installing ExtPage patch when configdialog loads.
+
+    Keeps tkinter heavy configdialog from being imported just so it
+    can be patched. Inside IDLE, idlelib.editor has already imported
+    configdialog before any extension loads, so this only helps when
+    the extension is imported outside IDLE, such as from the command
+    line, tools and tests.
+    """
+
+    __slots__ = ()
+
+    def find_spec(
+        self,
+        fullname: str,
+        path: Sequence[str] | None,
+        target: ModuleType | None = None,
+    ) -> ModuleSpec | None:
+        """Return spec of configdialog with a patching loader."""
+        if fullname != CONFIGDIALOG_MODULE:
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is None:
+            return spec
+        spec.loader = PatchingLoader(spec.loader)  # type: ignore[assignment]
+        return spec
+
+
+_ext_page_hook = ConfigDialogImportHook()
+
+
+def remove_ext_page_hook() -> bool:
+    """Remove configdialog import hook. Return if it was installed."""
+    if _ext_page_hook not in sys.meta_path:
+        return False
+    sys.meta_path.remove(_ext_page_hook)
+    return True
+
+
+def schedule_ext_page_patch() -> None:
+    """Patch ExtPage now if configdialog is loaded, otherwise on import.
+
+    Always patches right away inside IDLE, see ConfigDialogImportHook.
+    """
+    if CONFIGDIALOG_MODULE in sys.modules:
+        install_ext_page_patch()
+    elif _ext_page_hook not in sys.meta_path:
+        sys.meta_path.insert(0, _ext_page_hook)
+
+
+# Attributes of idleuserextend.extpage available from this module
+EXTPAGE_ATTRIBUTES = frozenset({"ExtPage", "ExtensionOption"})
+
+
+def __getattr__(name: str) -> object:
+    """Return attribute of extpage, importing it and configdialog if needed."""
+    if name in EXTPAGE_ATTRIBUTES:
+        return getattr(import_module(f"{__package__}.extpage"), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class BindingDelta(NamedTuple):
+    """Differences between two {virtual event : key sequences} dicts."""
+
+    # Event -> key sequences bound in new but not old
+    added: dict[str, list[str]]
+    # Event -> key sequences bound in old but not new
+    removed: dict[str, list[str]]
+    # Event -> new key sequences, for events bound in both that differ
+    changed: dict[str, list[str]]
+
+
+EMPTY_BINDING_DELTA = BindingDelta({}, {}, {})
+
+
+def find_binding_delta(
+    new: Mapping[str, Sequence[str]],
+    old: Mapping[str, Sequence[str]],
+) -> BindingDelta:
+    """Return bindings added, removed and changed in new compared to old."""
+    delta = BindingDelta({}, {}, {})
+    for event, new_keys in new.items():
+        old_keys = old.get(event)
+        if old_keys is None:
+            delta.added[event] = list(new_keys)
+            continue
+        # Baseline keysets hold lists, shared keyset holds tuples
+        if tuple(old_keys) == tuple(new_keys):
+            continue
+        old_set = set(old_keys)
+        new_set = set(new_keys)
+        added = [key for key in new_keys if key not in old_set]
+        removed = [key for key in old_keys if key not in new_set]
+        if added:
+            delta.added[event] = added
+        if removed:
+            delta.removed[event] = removed
+        if added or removed:
+            delta.changed[event] = list(new_keys)
+    for event, old_keys in old.items():
+        if event not in new and old_keys:
+            delta.removed[event] = list(old_keys)
+    return delta
+
+
+def find_added_bindings(
+    new: dict[str, list[str]],
+    old: dict[str, list[str]],
+) -> dict[str, list[str]]:
+    """Return the bindings that were added compared to old."""
+    return find_binding_delta(new, old).added
+
+
+# Current keyset shared by all windows for configuration generation
+_keyset_generation = -1
+_shared_keyset: Mapping[str, tuple[str, ...]] = MappingProxyType({})
+# id(baseline keydefs) -> (baseline keydefs, delta from baseline)
+_binding_delta_cache: dict[
+    int,
+    tuple[Mapping[str, Sequence[str]], BindingDelta],
+] = {}
+# Editor window -> keydefs currently applied to it
+_window_keydefs: weakref.WeakKeyDictionary[
+    PyShellEditorWindow,
+    Mapping[str, Sequence[str]],
+] = weakref.WeakKeyDictionary()
+
+
+def freeze_keyset(
+    keyset: Mapping[str, Iterable[str]],
+) -> Mapping[str, tuple[str, ...]]:
+    """Return read-only copy of keyset with interned key sequences.
+
+    Events with the same key sequences share one tuple.
+    """
+    key_tuples: dict[tuple[str, ...], tuple[str, ...]] = {}
+    frozen: dict[str, tuple[str, ...]] = {}
+    for event, keys in keyset.items():
+        key_tuple = tuple(sys.intern(key) for key in keys)
+        frozen[sys.intern(event)] = key_tuples.setdefault(key_tuple, key_tuple)
+    return MappingProxyType(frozen)
+
+
+def get_shared_keyset() -> Mapping[str, tuple[str, ...]]:
+    """Return current keyset, computed once per configuration generation.
+
+    Result is read-only, all windows share the same keyset.
+    """
+    global _keyset_generation, _shared_keyset
+    stale = _keyset_generation != _config_generation
+    if _stats_enabled:
+        record_cache_lookup("get_shared_keyset", not stale)
+    if stale:
+        generation = _config_generation
+        _shared_keyset = freeze_keyset(get_current_key_set.__wrapped__())
+        _keyset_generation = generation
+        _binding_delta_cache.clear()
+    return _shared_keyset
+
+
+@wraps(idleConf.GetCurrentKeySet)
+def get_current_key_set() -> dict[str, list[str]]:
+    """Return copy of current keyset that callers are free to modify.
+
+    Copied from get_shared_keyset, so the keyset is only computed once
+    per configuration generation.
+    """
+    return thaw_bindings(get_shared_keyset())
+
+
+idleConf.GetCurrentKeySet = get_current_key_set  # type: ignore[method-assign]
+
+
+def get_binding_delta(baseline: Mapping[str, Sequence[str]]) -> BindingDelta:
+    """Return delta from baseline keydefs to current keyset.
+
+    Computed once per configuration generation and baseline keydefs.
+    Do not modify, windows with the same baseline share the result.
+    """
+    keyset = get_shared_keyset()
+    if baseline is keyset:
+        return EMPTY_BINDING_DELTA
+    cached = _binding_delta_cache.get(id(baseline))
+    hit = cached is not None and cached[0] is baseline
+    if _stats_enabled:
+        record_cache_lookup("get_binding_delta", hit)
+    if hit:
+        assert cached is not None
+        return cached[1]
+    delta = find_binding_delta(keyset, baseline)
+    # Keep reference to baseline so its id is not reused
+    _binding_delta_cache[id(baseline)] = (baseline, delta)
+    report_binding_conflicts(delta.added)
+    return delta
+
+
+def apply_binding_delta(
+    editwin: PyShellEditorWindow,
+    delta: BindingDelta,
+) -> None:
+    """Apply binding delta to editor window text widget."""
+    text = editwin.text
+    for event, keys in delta.removed.items():
+        text.event_delete(event, *keys)
+    editwin.apply_bindings(delta.added)
+
+
+# Events of a key sequence, such as "<Control-Key-x>"
+KEY_EVENT_PATTERN = re.compile(r"<([^<>]+)>")
+# Event types that can be left out of key events
+KEY_EVENT_TYPES = frozenset({"Key", "KeyPress"})
+
+# Normalized key sequence -> virtual events it triggers
+_key_index: dict[str, frozenset[str]] = {}
+_key_index_generation = -1
+# (key sequence, events) conflicts already reported
+_reported_conflicts: set[tuple[str, frozenset[str]]] = set()
+
+
+def normalize_key_sequence(sequence: str) -> str:
+    """Return key sequence in a form equivalent sequences share.
+
+    Key event types are removed and modifiers are sorted, so
+    "<Shift-Control-Key-k>" and "<Control-Shift-k>" are the same.
+    Sequences that are not made of <...> events are returned as is.
+    """
+    events = KEY_EVENT_PATTERN.findall(sequence)
+    if "".join(f"<{event}>" for event in events) != sequence:
+        return sequence
+    normalized: list[str] = []
+    for event in events:
+        *fields, detail = event.split("-")
+        if not detail:
+            # Detail is "-" or event is malformed
+            return sequence
+        modifiers = sorted(
+            field for field in fields if field not in KEY_EVENT_TYPES
+        )
+        normalized.append(f"<{'-'.join((*modifiers, detail))}>")
+    return "".join(normalized)
+
+
+def build_key_index() -> dict[str, frozenset[str]]:
+    """Return {key sequence : virtual events} for current bindings.
+
+    Covers the current keyset and the non-configurable bindings of
+    active extensions, which windows also apply.
+    """
+    events_by_key: dict[str, set[str]] = {}
+    for event, keys in get_shared_keyset().items():
+        for key in keys:
+            events_by_key.setdefault(
+                normalize_key_sequence(key),
+                set(),
+            ).add(event)
+    for extension in idleConf.GetExtensions(active_only=True):
+        info = get_binding_info(extension)
+        for event_name, extension_keys in info.bindings.items():
+            for key in extension_keys:
+                events_by_key.setdefault(
+                    normalize_key_sequence(key),
+                    set(),
+                ).add(f"<<{event_name}>>")
+    return {key: frozenset(events) for key, events in events_by_key.items()}
+
+
+def get_key_index() -> dict[str, frozenset[str]]:
+    """Return {key sequence : virtual events}, built once per generation.
+
+    Keys are normalized with normalize_key_sequence. Do not modify,
+    result is shared.
+    """
+    global _key_index, _key_index_generation
+    stale = _key_index_generation != _config_generation
+    if _stats_enabled:
+        record_cache_lookup("get_key_index", not stale)
+    if stale:
+        generation = _config_generation
+        _key_index = build_key_index()
+        _key_index_generation = generation
+    return _key_index
+
+
+def get_events_for_key(sequence: str) -> frozenset[str]:
+    """Return virtual events key sequence triggers."""
+    return get_key_index().get(normalize_key_sequence(sequence), frozenset())
+
+
+def get_key_conflicts() -> dict[str, frozenset[str]]:
+    """Return {key sequence : virtual events} for keys with many events."""
+    return {
+        key: events
+        for key, events in get_key_index().items()
+        if len(events) > 1
+    }
+
+
+def find_binding_conflicts(
+    bindings: Mapping[str, Iterable[str]],
+) -> dict[str, frozenset[str]]:
+    """Return {key sequence : virtual events} for keys in bindings.
+
+    Only includes keys bindings share with other virtual events.
+    """
+    index = get_key_index()
+    conflicts: dict[str, frozenset[str]] = {}
+    for event, keys in bindings.items():
+        for key in keys:
+            normalized = normalize_key_sequence(key)
+            events = index.get(normalized, frozenset()) | {event}
+            if len(events) > 1:
+                conflicts[normalized] = events
+    return conflicts
+
+
+def report_binding_conflicts(bindings: Mapping[str, Iterable[str]]) -> None:
+    """Print warning for each new conflict bindings have."""
+    for key, events in find_binding_conflicts(bindings).items():
+        if (key, events) in _reported_conflicts:
+            continue
+        _reported_conflicts.add((key, events))
+        print(
+            f"[{__title__}] Key binding conflict: {key} triggers "
+            f"{', '.join(sorted(events))}",
+            file=sys.stderr,
+        )
+
+
+def print_key_conflicts() -> bool:
+    """Print key sequences bound to many events. Return if any are."""
+    conflicts = get_key_conflicts()
+    for key, events in sorted(conflicts.items()):
+        print(f"{key}\t{' '.join(sorted(events))}")
+    return bool(conflicts)
+
+
+# id(menudefs) -> (menudefs, {virtual event : [(menubar item, label)]})
+_menu_event_index_cache: dict[
+    int,
+    tuple[
+        Sequence[tuple[str, Sequence[tuple[str, str] | None]]],
+        dict[str, list[tuple[str, str]]],
+    ],
+] = {}
+
+# Menu indices Tk does not treat as label patterns
+TK_MENU_INDEX_KEYWORDS = frozenset({"active", "end", "last", "none"})
+# First characters of position and numeric menu indices
+TK_MENU_INDEX_PREFIXES = frozenset("@+-0123456789")
+
+
+def get_menu_event_index(
+    menudefs: Sequence[tuple[str, Sequence[tuple[str, str] | None]]],
+) -> dict[str, list[tuple[str, str]]]:
+    """Return {virtual event : [(menubar item, label)]} for menudefs.
+
+    Built once per menudefs object and cached.
+    """
+    # Imported here as idlelib.editor imports idlelib.configdialog
+    from idlelib.editor import prepstr
+
+    cached = _menu_event_index_cache.get(id(menudefs))
+    if cached is not None and cached[0] is menudefs:
+        return cached[1]
+    index: dict[str, list[tuple[str, str]]] = {}
+    for group_title, bindings in menudefs:
+        for item in bindings:
+            if not item:
+                continue
+            label, virt_event = item
+            index.setdefault(virt_event, []).append(
+                (group_title, prepstr(label)[1]),
+            )
+    # Keep reference to menudefs so its id is not reused
+    _menu_event_index_cache[id(menudefs)] = (menudefs, index)
+    return index
+
+
+def find_menu_entry(menu: Menu, label: str) -> int | None:
+    """Return index of command entry with label in menu or None."""
+    if (
+        label in TK_MENU_INDEX_KEYWORDS
+        or label.lstrip()[:1] in TK_MENU_INDEX_PREFIXES
+    ):
+        # Label would be taken as a different kind of index, search.
+        end = menu.index("end")
+        if end is None:
+            return None
+        for entry in range(end + 1):
+            if (
+                menu.type(entry) == "command"
+                and menu.entrycget(entry, "label") == label
+            ):
+                return entry
+        return None
+    # Escape Tcl string match special characters so label matches itself.
+    pattern = "".join(
+        f"\\{char}" if char in "*?[]\\" else char for char in label
+    )
+    try:
+        index = menu.index(pattern)
+    except tk.TclError:
+        return None
+    if index is None or menu.type(index) != "command":
+        return None
+    return index
+
+
+def refresh_menu_accelerators(
+    editwin: PyShellEditorWindow,
+    events: Iterable[str],
+) -> None:
+    """Update accelerators of menu entries for events to current keydefs.
+
+    Only entries bound to given virtual events are visited, and only
+    entries that already display an accelerator that is now out of
+    date are changed.
+    """
+    # Imported here as idlelib.editor imports idlelib.configdialog
+    from idlelib.editor import get_accelerator
+
+    menu_event_index = get_menu_event_index(editwin.mainmenu.menudefs)
+    keydefs = editwin.mainmenu.default_keydefs
+    for event in events:
+        for menubar_item, label in menu_event_index.get(event, ()):
+            menu = editwin.menudict.get(menubar_item)
+            if menu is None:
+                continue
+            index = find_menu_entry(menu, label)
+            if index is None:
+                continue
+            accel = menu.entrycget(index, "accelerator")
+            if not accel:
+                continue
+            new_accel = get_accelerator(keydefs, event)
+            if new_accel != accel:
+                menu.entryconfig(index, accelerator=new_accel)
+
+
+def apply_keybindings_for_previous(editwin: PyShellEditorWindow) -> None:
+    """Apply the virtual keybindings for extensions that didn't load properly.
+
+    Also update hotkeys to current keyset.
+
+    Modified version of idlelib.editor.ApplyKeybindings.
+    """
+    new_default_keydefs = get_shared_keyset()
+    # Windows remember what was applied to them so config changes can
+    # be applied to already open windows too.
+    baseline = _window_keydefs.get(editwin, editwin.mainmenu.default_keydefs)
+    delta = get_binding_delta(baseline)
+    # print(f'[{__title__}] {delta = }')
+    apply_binding_delta(editwin, delta)
+    editwin.mainmenu.default_keydefs = new_default_keydefs  # type: ignore[attr-defined]
+    _window_keydefs[editwin] = new_default_keydefs
+    # Already handled adding extension keybindings as a part of prior
+    # for extension_name in editwin.get_standard_extension_names():
+    #     extension_keydefs = get_user_added_extension_bindings(extension_name)
+    #     print(f'[{__title__}] {extension_name = } {extension_keydefs = }')
+    #     if extension_keydefs:
+    #         editwin.apply_bindings(extension_keydefs)
+
+    # Update menu accelerators.
+    refresh_menu_accelerators(editwin, delta.added.keys() | delta.removed)
+
+
+# Editor windows waiting for keybindings, in order they were queued
+_keybinding_queue: weakref.WeakKeyDictionary[PyShellEditorWindow, None] = (
+    weakref.WeakKeyDictionary()
+)
+# Whether flush_keybinding_queue is scheduled to run
+_keybinding_flush_scheduled = False
+
+
+def queue_keybindings(editwin: PyShellEditorWindow) -> None:
+    """Apply keybindings to editor window when Tk is next idle.
+
+    Windows opened together, like when IDLE restores many files, are
+    handled in one batch, and opening them does not wait for it.
+    """
+    global _keybinding_flush_scheduled
+    # Windows share mainmenu, which the first window flushed changes,
+    # so remember the keydefs this window was bound with now.
+    _window_keydefs.setdefault(editwin, editwin.mainmenu.default_keydefs)
+    _keybinding_queue[editwin] = None
+    if _keybinding_flush_scheduled:
+        return
+    # Scheduled on root, callbacks of closed windows are deleted
+    editwin.root.after_idle(flush_keybinding_queue)
+    _keybinding_flush_scheduled = True
+
+
+def flush_keybinding_queue() -> None:
+    """Apply keybindings to queued windows that are still open."""
+    global _keybinding_flush_scheduled
+    _keybinding_flush_scheduled = False
+    windows = list(_keybinding_queue)
+    _keybinding_queue.clear()
+    for editwin in windows:
+        # Closing a window sets its text to None
+        if getattr(editwin, "text", None) is None:
+            continue
+        apply_keybindings_for_previous(editwin)
+
+
+# Milliseconds between checks for configuration file changes
+CONFIG_WATCH_INTERVAL = 1000
+
+# Widget config watcher timer runs on and id of its pending timer
+_config_watch_widget: tk.Misc | None = None
+_config_watch_after_id: str | None = None
+_config_watch_interval = CONFIG_WATCH_INTERVAL
+
+
+def reapply_changed_config() -> bool:
+    """Load changed configuration files and update open windows.
+
+    Only files that changed on disk are parsed again, and only the
+    binding differences are applied to windows. Option values of
+    registered extensions are updated too. Return if any changed.
+    """
+    generation = _config_generation
+    idleConf.LoadCfgFiles()
+    if generation == _config_generation:
+        return False
+    for extension in tuple(_registered_extensions.values()):
+        set_extension_values(extension)
+    for editwin in list(_window_keydefs):
+        # Closing a window sets its text to None
+        if getattr(editwin, "text", None) is None:
+            continue
+        apply_keybindings_for_previous(editwin)
+    return True
+
+
+def poll_config_files() -> None:
+    """Apply configuration file changes and schedule next check."""
+    global _config_watch_after_id
+    _config_watch_after_id = None
+    try:
+        reapply_changed_config()
+    finally:
+        widget = _config_watch_widget
+        if widget is not None:
+            try:
+                _config_watch_after_id = widget.after(
+                    _config_watch_interval,
+                    poll_config_files,
+                )
+            except tk.TclError:
+                # Widget was destroyed
+                stop_config_watcher()
+
+
+def start_config_watcher(
+    widget: tk.Misc,
+    interval: int = CONFIG_WATCH_INTERVAL,
+) -> None:
+    """Check configuration files for changes every interval milliseconds.
+
+    Uses timers of widget, which should be the Tk root window.
+    Does nothing if already watching.
+    """
+    global _config_watch_widget, _config_watch_after_id, _config_watch_interval
+    if _config_watch_widget is not None:
+        return
+    _config_watch_widget = widget
+    _config_watch_interval = interval
+    _config_watch_after_id = widget.after(interval, poll_config_files)
+
+
+def stop_config_watcher() -> None:
+    """Stop checking configuration files for changes."""
+    global _config_watch_widget, _config_watch_after_id
+    widget = _config_watch_widget
+    after_id = _config_watch_after_id
+    _config_watch_widget = None
+    _config_watch_after_id = None
+    if widget is not None and after_id is not None:
+        with contextlib.suppress(tk.TclError):
+            widget.after_cancel(after_id)
+
+
+def get_timed_attributes() -> tuple[tuple[object, str, str, str], ...]:
+    """Return (object, attribute name, name, category) of timed functions.
+
+    Imports patched ExtPage, and with it idlelib.configdialog.
+    """
+    from idleuserextend.extpage import ExtPage
+
+    module = sys.modules[__name__]
+    return (
+        (
+            idleConf,
+            get_mangled(idleConf, "__GetRawExtensionKeys"),
+            "get_raw_extension_keys",
+            "bindings",
+        ),
+        (idleConf, "GetCurrentKeySet", "get_current_key_set", "bindings"),
+        (idleConf, "GetExtensionKeys", "get_extension_keys", "bindings"),
+        (
+            idleConf,
+            "GetExtensionBindings",
+            "get_extension_bindings",
+            "bindings",
+        ),
+        (idleConf, "GetExtensions", "get_extensions", "config"),
+        (idleConf, "LoadCfgFiles", "load_cfg_files", "config"),
+        (module, "load_parser", "load_parser", "config"),
+        (ExtPage, "load_extensions", "ExtPage.load_extensions", "config"),
+        (
+            module,
+            "apply_keybindings_for_previous",
+            "apply_keybindings_for_previous",
+            "window",
+        ),
+        (module, "apply_binding_delta", "apply_binding_delta", "window"),
+        (
+            module,
+            "refresh_menu_accelerators",
+            "refresh_menu_accelerators",
+            "window",
+        ),
+    )
+
+
+def install_timers() -> None:
+    """Install timing wrappers on patched functions if not installed.
+
+    Timing wrappers are only installed while statistics or tracing
+    are enabled, so otherwise they do not slow down patched functions.
+    """
+    if _stats_patched:
+        return
+    for obj, attr_name, name, category in get_timed_attributes():
+        original = getattr(obj, attr_name)
+        _stats_patched.append((obj, attr_name, original))
+        setattr(obj, attr_name, time_calls(name, original, category))
+
+
+def remove_timers() -> None:
+    """Remove timing wrappers unless statistics or tracing are enabled."""
+    if _stats_enabled or _trace_enabled:
+        return
+    while _stats_patched:
+        obj, attr_name, original = _stats_patched.pop()
+        setattr(obj, attr_name, original)
+
+
+def enable_stats() -> None:
+    """Start recording call and cache statistics for patched functions."""
+    global _stats_enabled
+    _stats_enabled = True
+    install_timers()
+
+
+def disable_stats() -> None:
+    """Stop recording statistics. Recorded statistics are kept."""
+    global _stats_enabled
+    _stats_enabled = False
+    remove_timers()
+
+
+def report_stats() -> None:
+    """Print recorded statistics to stderr."""
+    print(f"[{__title__}] statistics:", file=sys.stderr)
+    print(format_stats(), file=sys.stderr)
+
+
+def stats_enabled() -> bool:
+    """Return if call and cache statistics are being recorded."""
+    return _stats_enabled
+
+
+def enable_trace(size: int = TRACE_BUFFER_SIZE) -> None:
+    """Start tracing calls of patched functions.
+
+    Only the most recent size trace events are kept.
+    """
+    global _trace_enabled, _trace_events
+    if _trace_events.maxlen != size:
+        _trace_events = deque(_trace_events, maxlen=size)
+    _trace_enabled = True
+    install_timers()
+
+
+def disable_trace() -> None:
+    """Stop tracing calls. Recorded trace events are kept."""
+    global _trace_enabled
+    _trace_enabled = False
+    remove_timers()
+
+
+def trace_enabled() -> bool:
+    """Return if calls are being traced."""
+    return _trace_enabled
+
+
+def get_trace() -> list[TraceEvent]:
+    """Return recorded trace events, oldest first."""
+    return list(_trace_events)
+
+
+def reset_trace() -> None:
+    """Forget all recorded trace events."""
+    _trace_events.clear()
+
+
+def get_chrome_trace() -> dict[str, object]:
+    """Return recorded trace events in Chrome trace event format.
+
+    Can be viewed with trace viewers such as Perfetto or chrome://tracing
+    once written to a file as JSON.
+    """
+    pid = os.getpid()
+    return {
+        "traceEvents": [
+            {
+                "name": event.name,
+                "cat": event.category,
+                "ph": "X",
+                "ts": event.start * 1_000_000,
+                "dur": event.duration * 1_000_000,
+                "pid": pid,
+                "tid": event.thread,
+                "args": event.details,
+            }
+            for event in _trace_events
+        ],
+        "displayTimeUnit": "ms",
+    }
+
+
+def write_trace(path: str) -> None:
+    """Write recorded trace events to path as Chrome trace event JSON."""
+    # Imported here as it is only needed when tracing
+    import json
+
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(get_chrome_trace(), file)
+
+
+# Options IDLE reads itself, not set as extension class attributes
+ENABLE_OPTIONS = frozenset({"enable", "enable_editor", "enable_shell"})
+
+# Extension name -> registered extension class
+_registered_extensions: dict[str, type] = {}
+# Names of registered extensions with defaults not applied yet, in order
+_pending_registrations: dict[str, None] = {}
+# Whether apply_registered_defaults is scheduled to run
+_registration_flush_scheduled = False
+
+
+def ensure_extension_config(
+    extension: str,
+    values: Mapping[str, str | None],
+) -> bool:
+    """Ensure extension section and option defaults exist. Return if edited."""
+    need_save = False
+    if ensure_section_exists(extension):
+        need_save = True
+    if ensure_values_exist_in_section(extension, values):
+        need_save = True
+    return need_save
+
+
+def ensure_extension_bindings(
+    extension: str,
+    bind_defaults: Mapping[str, str | None],
+) -> bool:
+    """Ensure extension key binding defaults exist. Return if edited."""
+    if not bind_defaults:
+        return False
+
+    need_save = False
+    section = f"{extension}_cfgBindings"
+    if ensure_section_exists(section):
+        need_save = True
+    if ensure_values_exist_in_section(section, bind_defaults):
+        need_save = True
+    return need_save
+
+
+def set_extension_values(extension: type) -> dict[str, str | None]:
+    """Set configured option values as extension class attributes.
+
+    Options extension declares in its values dict are looked up, with
+    declared values as defaults. Return {option : value} that were set.
+    """
+    options = get_merged_section(extension.__name__)
+    declared: Mapping[str, str | None] = getattr(extension, "values", {})
+    values: dict[str, str | None] = {}
+    for key, default in declared.items():
+        if key in ENABLE_OPTIONS:
+            continue
+        values[key] = options.get(key, default)
+        setattr(extension, key, values[key])
+    return values
+
+
+def register_extension(extension: type) -> None:
+    """Register extension class to have its configuration defaults applied.
+
+    Class declares {option : default} as values and optionally
+    {event name : default key sequences} as bind_defaults, like
+    idleuserextend does. Configured option values are set as class
+    attributes right away. Defaults of every extension registered before
+    apply_registered_defaults runs are written in one pass, with at most
+    one save and one reload, after which values are set again. That
+    happens when idleuserextend initializes, or after that when Tk is
+    next idle, or right away if Tk's root is unknown. Call
+    apply_registered_defaults to apply them sooner.
+    Values are set again whenever reapply_changed_config finds changes.
+    """
+    global _registration_flush_scheduled
+    set_extension_values(extension)
+    _registered_extensions[extension.__name__] = extension
+    _pending_registrations[extension.__name__] = None
+    if _registration_flush_scheduled:
+        return
+    if call_when_idle(apply_registered_defaults):
+        _registration_flush_scheduled = True
+    elif _initialized:
+        # Nothing else would apply them
+        apply_registered_defaults()
+
+
+def unregister_extension(extension: type) -> None:
+    """Stop applying defaults and setting values of extension class."""
+    _registered_extensions.pop(extension.__name__, None)
+    _pending_registrations.pop(extension.__name__, None)
+
+
+def apply_registered_defaults() -> None:
+    """Apply configuration defaults of pending registered extensions.
+
+    Missing defaults of all of them are written in a single batch, then
+    configuration files are reloaded once and configured option values
+    are set as class attributes of each extension.
+    """
+    global _registration_flush_scheduled
+    _registration_flush_scheduled = False
+    if not _pending_registrations:
+        return
+    pending = [_registered_extensions[name] for name in _pending_registrations]
+    _pending_registrations.clear()
+
+    # Ensure file default values exist so they appear in settings menu
+    need_save = False
+    for extension in pending:
+        if ensure_extension_config(
+            extension.__name__,
+            getattr(extension, "values", {}),
+        ):
+            need_save = True
+        if ensure_extension_bindings(
+            extension.__name__,
+            getattr(extension, "bind_defaults", {}),
+        ):
+            need_save = True
+    if need_save:
+        idleConf.SaveUserCfgFiles()
+
+    # Reload configuration file
+    idleConf.LoadCfgFiles()
+
+    for extension in pending:
+        set_extension_values(extension)
+
+
+# Important weird: If event handler function returns 'break',
+# then it prevents other bindings of same event type from running.
+# If returns None, normal and others are also run.
+
+
+class idleuserextend:  # noqa: N801
+    """Extension that fixes loading extensions from the user config file."""
+
+    __slots__ = ("editwin",)
+
+    # Extend the file and format menus.
+    menudefs: ClassVar[
+        Sequence[tuple[str, Sequence[tuple[str, str] | None]]]
+    ] = ()
+
+    # Default values for configuration file
+    values: ClassVar[dict[str, str]] = {
+        "enable": "True",
+        "enable_editor": "True",
+        "enable_shell": "False",
+        "defer_keybindings": "False",
+        "watch_config": "False",
+    }
+    # Default key binds for configuration file
+    bind_defaults: ClassVar[dict[str, str | None]] = {}
+
+    # Set from configuration by reload
+    defer_keybindings: ClassVar[str] = values["defer_keybindings"]
+    watch_config: ClassVar[str] = values["watch_config"]
+
+    def __init__(self, editwin: PyShellEditorWindow) -> None:
+        """Initialize the settings for this extension."""
+        self.editwin: PyShellEditorWindow = editwin
+        # print(f"[{__title__}] Initialize")
+
+        # Finish initialization deferred from import. IDLE has no default
+        # root, so coalescing saves only starts once a window is known.
+        schedule_initialization(editwin.root)
+        ensure_initialized()
+
+        # Properly bind extensions that didn't load completely before
+        if self.defer_keybindings == "True":
+            queue_keybindings(editwin)
+        else:
+            apply_keybindings_for_previous(editwin)
+
+        if self.watch_config == "True":
+            start_config_watcher(editwin.root)
+
+    def __repr__(self) -> str:
+        """Return representation of self."""
+        return f"{self.__class__.__name__}({self.editwin!r})"
+
+    @classmethod
+    def ensure_bindings_exist(cls) -> bool:
+        """Ensure key bindings exist in user extensions configuration.
+
+        Return True if need to save.
+        """
+        return ensure_extension_bindings(cls.__name__, cls.bind_defaults)
+
+    @classmethod
+    def ensure_config_exists(cls) -> bool:
+        """Ensure required configuration exists for this extension.
+
+        Return True if need to save.
+        """
+        return ensure_extension_config(cls.__name__, cls.values)
+
+    @classmethod
+    def reload(cls) -> None:
+        """Load class variables from configuration."""
+        # print(f"[{__title__}] reload fires")
+        # Defaults of extensions registered so far are applied together
+        register_extension(cls)
+        apply_registered_defaults()
+
+    # def close(self) -> None:
+    #     """Called when and IDLE window is closing."""
+    #     print("[idleuserextend] close fires")
+
+    def on_reloading(self) -> None:
+        """Idlereload integration, fired when about to reload."""
+        # print(f"[{__title__}]: on_reloading, unwrapping attributes")
+        disable_stats()
+        disable_trace()
+        stop_config_watcher()
+        unwrap_attribute(
+            idleConf,
+            get_mangled(idleConf, "__GetRawExtensionKeys"),
+        )
+        unwrap_attribute(idleConf, "GetCurrentKeySet")
+        unwrap_attribute(idleConf, "GetExtensionKeys")
+        unwrap_attribute(idleConf, "GetExtensionBindings")
+        unwrap_attribute(idleConf, "GetExtensions")
+        unwrap_attribute(idleConf, "LoadCfgFiles")
+        unwrap_attribute(idleConf, "SaveUserCfgFiles")
+        flush_pending_saves()
+        _keybinding_queue.clear()
+        for parser in idleConf.userCfg.values():
+            unpatch_user_parser(parser)
+        # ExtPage is only patched once configdialog has been imported
+        remove_ext_page_hook()
+        configdialog = sys.modules.get(CONFIGDIALOG_MODULE)
+        if configdialog is not None:
+            unwrap_attribute(configdialog, "ExtPage")
+
+
+_initialized = False
+# Whether finish_startup is scheduled or has run
+_initialization_scheduled = False
+# Tk root of IDLE's windows. IDLE calls tkinter.NoDefaultRoot, so
+# tkinter does not know it, only windows extensions get do.
+_tk_root: tk.Misc | None = None
+
+
+def get_tk_root() -> tk.Misc | None:
+    """Return Tk root to schedule callbacks on or None if unknown."""
+    if _tk_root is not None:
+        return _tk_root
+    root: tk.Misc | None = getattr(tk, "_default_root", None)
+    return root
+
+
+def call_when_idle(callback: Callable[[], object]) -> bool:
+    """Schedule callback for when Tk is next idle. Return if scheduled."""
+    root = get_tk_root()
+    if root is None:
+        return False
+    try:
+        root.after_idle(callback)
+    except tk.TclError:
+        # Root window was destroyed
+        return False
+    return True
+
+
+def ensure_initialized() -> None:
+    """Run deferred initialization if it has not happened yet.
+
+    Ensures configuration exists, saving if needed, and reloads
+    configuration files. Kept out of import so IDLE startup does not
+    have to wait for it before showing windows.
+    """
+    global _initialized
+    if _initialized:
+        return
+    _initialized = True
+    idleuserextend.reload()
+
+
+def finish_startup() -> None:
+    """Run deferred initialization and write saves deferred during startup."""
+    global _save_batch_depth
+    try:
+        ensure_initialized()
+    finally:
+        _save_batch_depth -= 1
+        if not _save_batch_depth:
+            flush_pending_saves()
+
+
+def schedule_initialization(root: tk.Misc | None = None) -> None:
+    """Schedule deferred initialization for when Tk is idle, if running.
+
+    If root is given, it is remembered as the Tk root to use. Until
+    Tk is idle, saves requested by extensions loading at startup are
+    coalesced into a single save.
+    """
+    global _save_batch_depth, _initialization_scheduled, _tk_root
+    if root is not None and _tk_root is None:
+        _tk_root = root
+    if _initialization_scheduled or not call_when_idle(finish_startup):
+        return
+    _initialization_scheduled = True
+    _save_batch_depth += 1
+    # Do not lose deferred saves if Tk never becomes idle
+    atexit.register(flush_pending_saves)
+
+
+schedule_ext_page_patch()
+schedule_initialization()
+
+if os.environ.get("IDLEUSEREXTEND_STATS"):
+    enable_stats()
+    atexit.register(report_stats)
+
+if os.environ.get("IDLEUSEREXTEND_TRACE"):
+    enable_trace()
+    atexit.register(write_trace, os.environ["IDLEUSEREXTEND_TRACE"])
+
+
+if __name__ == "__main__":
+    print(f"{__title__} v{__version__}\nProgrammed by {__author__}.\n")
+    check_installed()
@@ -0,0 +1,229 @@
+"""Idle User Extend - Extension Page.
+
+Patched extensions page of IDLE's configuration dialog. Importing this
+module imports idlelib.configdialog and installs the patch.
+"""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+# Idle User Extend
+# Copyright (C) 2023-2025  CoolCat467
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from idlelib import configdialog
+from idlelib.config import idleConf
+from tkinter import StringVar
+from typing import TYPE_CHECKING, ClassVar
+
+from idleuserextend.extension import get_option_schema
+
+if TYPE_CHECKING:
+    import tkinter as tk
+    from collections.abc import Iterator
+
+    from idleuserextend.extension import OptionSchema
+
+
+class ExtensionOption:
+    """Option of an extension on the extensions page.
+
+    Supports the dict style access IDLE's own ExtPage code uses.
+    """
+
+    __slots__ = ("default", "name", "snapshot", "type", "value", "var")
+
+    # Keys of option dicts IDLE's ExtPage creates
+    _fields: ClassVar[tuple[str, ...]] = (
+        "name",
+        "type",
+        "default",
+        "value",
+        "var",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        option_type: str | None,
+        default: str,
+        value: bool | int | str,
+        var: StringVar,
+    ) -> None:
+        """Initialize option, remembering current value of var."""
+        self.name = name
+        # "bool", "int", or None for string options
+        self.type = option_type
+        self.default = default
+        self.value = value
+        self.var = var
+        # Value of var when option was loaded or last saved
+        self.snapshot = var.get()
+
+    @classmethod
+    def from_schema(
+        cls,
+        schema: OptionSchema,
+        var: StringVar,
+    ) -> ExtensionOption:
+        """Return option for schema, setting var to its value."""
+        var.set(str(schema.value))
+        return cls(schema.name, schema.type, schema.default, schema.value, var)
+
+    def __repr__(self) -> str:
+        """Return representation of self."""
+        return (
+            f"{self.__class__.__name__}({self.name!r}, {self.type!r}, "
+            f"{self.default!r}, {self.value!r}, {self.var!r})"
+        )
+
+    def __getitem__(self, key: str) -> str | bool | int | StringVar | None:
+        """Return value of attribute key, like IDLE's option dicts."""
+        if key not in self._fields:
+            raise KeyError(key)
+        value: str | bool | int | StringVar | None = getattr(self, key)
+        return value
+
+    def __setitem__(
+        self,
+        key: str,
+        value: str | bool | int | StringVar | None,
+    ) -> None:
+        """Set attribute key to value, like IDLE's option dicts."""
+        if key not in self._fields:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: object) -> bool:
+        """Return if key is a key of IDLE's option dicts."""
+        return key in self._fields
+
+    def __iter__(self) -> Iterator[str]:
+        """Return iterator over keys of IDLE's option dicts."""
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        """Return number of keys of IDLE's option dicts."""
+        return len(self._fields)
+
+    def keys(self) -> tuple[str, ...]:
+        """Return keys of IDLE's option dicts."""
+        return self._fields
+
+    def get(
+        self,
+        key: str,
+        default: str | bool | int | StringVar | None = None,
+    ) -> str | bool | int | StringVar | None:
+        """Return value of attribute key or default if not a key."""
+        if key not in self._fields:
+            return default
+        return self[key]
+
+    def is_changed(self) -> bool:
+        """Return if value of var changed since snapshot was taken."""
+        return self.var.get() != self.snapshot
+
+
+original_ext_page = configdialog.ExtPage
+
+
+class ExtPage(configdialog.ExtPage):
+    """Modified copy of ExtPage with patched load_extensions."""
+
+    __wrapped__ = original_ext_page
+
+    def load_extensions(self) -> None:
+        """Fill self.extensions with names from the default and user configs.
+
+        Options of an extension are loaded by load_extension_options
+        when it is first selected, until then its option list is empty.
+        """
+        # [assignment] Options are records instead of dicts
+        self.extensions: dict[str, list[ExtensionOption]] = {}  # type: ignore[assignment]
+        self.loaded_extensions: set[str] = set()
+
+        for ext_name in idleConf.GetExtensions(active_only=False):
+            # Former built-in extensions are already filtered out.
+            self.extensions[ext_name] = []
+
+    def load_extension_options(self, ext_name: str) -> None:
+        """Fill self.extensions[ext_name] with data from the configs."""
+        if ext_name in self.loaded_extensions:
+            return
+        self.loaded_extensions.add(ext_name)
+        self.extensions[ext_name] = [
+            ExtensionOption.from_schema(schema, StringVar(self))
+            for schema in get_option_schema(ext_name).values()
+        ]
+
+    def create_extension_frame(self, ext_name: str) -> None:
+        """Create frame for extension later, when it is first selected."""
+
+    def extension_selected(self, event: tk.Event[tk.Misc] | None) -> None:
+        """Handle selection of an extension from the list.
+
+        Load options and create frame of extension on first selection.
+        """
+        selection = self.extension_list.curselection()  # type: ignore[no-untyped-call]
+        if selection:
+            ext_name: str = self.extension_list.get(selection)
+            if ext_name not in self.config_frame:
+                self.load_extension_options(ext_name)
+                super().create_extension_frame(ext_name)
+        super().extension_selected(event)
+
+    # [override] Options are records instead of dicts
+    def set_extension_value(  # type: ignore[override]
+        self,
+        section: str,
+        opt: ExtensionOption,
+    ) -> bool:
+        """Return True if the configuration was added or changed.
+
+        If the value is the same as the default, then remove it
+        from user config file.
+        """
+        value = opt.var.get().strip() or opt.default
+        opt.var.set(value)
+
+        # Only save option in user config if it differs from the default
+        schema = get_option_schema(section).get(opt.name)
+        if schema is not None and value == schema.config_default:
+            return bool(self.ext_userCfg.RemoveOption(section, opt.name))
+
+        # Set the option.
+        return bool(self.ext_userCfg.SetOption(section, opt.name, value))
+
+    def save_all_changed_extensions(self) -> None:
+        """Save configuration changes to the user config file.
+
+        Only options whose value changed since they were loaded are
+        set, and the file is only written if something changed.
+        """
+        has_changes = False
+        for ext_name in self.loaded_extensions:
+            for opt in self.extensions[ext_name]:
+                if not opt.is_changed():
+                    continue
+                if self.set_extension_value(ext_name, opt):
+                    has_changes = True
+                opt.snapshot = opt.var.get()
+        if has_changes:
+            self.ext_userCfg.Save()
+
+
+# Cannot assign to a type
+configdialog.ExtPage = ExtPage  # type: ignore[misc]
@@ -0,0 +1,28 @@
+"""Shared test fixtures."""
+
+from __future__ import annotations
+
+from idlelib.config import idleConf
+from typing import TYPE_CHECKING
+
+import pytest
+
+import idleuserextend
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+
+@pytest.fixture
+def fake_extension() -> Generator[str, None, None]:
+    user = idleConf.userCfg["extensions"]
+    name = "IdleUserExtendTestExt"
+    user.SetOption(f"{name}_bindings", "fake-event", "<Control-Key-F11>")
+    try:
+        yield name
+    finally:
+        for section in (name, f"{name}_bindings", f"{name}_cfgBindings"):
+            user.remove_section(section)
+        # Back to what is saved, nothing left to keep from reloading
+        idleuserextend.extension._dirty_sections.pop("extensions", None)
+        idleuserextend.bump_config_generation()
@@ -0,0 +1,113 @@
+"""Test check.py."""
+
+from __future__ import annotations
+
+import codecs
+import locale
+import os
+import subprocess
+import sys
+from configparser import ConfigParser
+from typing import TYPE_CHECKING
+
+import pytest
+
+from idleuserextend import check
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def make_config(text: str) -> ConfigParser:
+    parser = ConfigParser(interpolation=None)
+    parser.read_string(text)
+    return parser
+
+
+@pytest.mark.parametrize(
+    ("default", "user", "expected"),
+    [
+        ("", "", False),
+        ("", "[idleuserextend]\nenable = True\n", True),
+        ("[idleuserextend]\nenable = True\n", "", True),
+        (
+            "[idleuserextend]\nenable = True\n",
+            "[idleuserextend]\nenable = False\n",
+            False,
+        ),
+        ("", "[idleuserextend]\nenable = fish\n", True),
+        (
+            "[idleuserextend]\nenable = False\n",
+            "[idleuserextend]\nenable = fish\n",
+            False,
+        ),
+        ("", "[idleuserextend]\n", True),
+    ],
+)
+def test_is_registered(default: str, user: str, expected: bool) -> None:
+    assert (
+        check.is_registered(make_config(default), make_config(user))
+        is expected
+    )
+
+
+def test_read_extensions_config_user_file(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("USERPROFILE", str(tmp_path))
+    (tmp_path / ".idlerc").mkdir()
+    (tmp_path / ".idlerc" / "config-extensions.cfg").write_text(
+        "[idleuserextend]\nenable = True\n",
+        encoding="utf-8",
+    )
+    default, user = check.read_extensions_config()
+    assert default.has_section("ZzDummy")
+    assert check.is_registered(default, user)
+
+
+@pytest.mark.skipif(
+    codecs.lookup(locale.getpreferredencoding(False)).name != "utf-8",
+    reason="file must be undecodable in locale encoding",
+)
+def test_read_extensions_config_undecodable_file(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("USERPROFILE", str(tmp_path))
+    (tmp_path / ".idlerc").mkdir()
+    (tmp_path / ".idlerc" / "config-extensions.cfg").write_bytes(
+        b"[idleuserextend]\nenable = True\n# caf\xe9\n",
+    )
+    default, user = check.read_extensions_config()
+    assert default.has_section("ZzDummy")
+    assert not user.sections()
+
+
+def test_check_does_not_import_gui_or_write(tmp_path: Path) -> None:
+    code = (
+        "import sys\n"
+        "sys.argv = ['idleuserextend', '--check']\n"
+        "import idleuserextend\n"
+        "try:\n"
+        "    idleuserextend.check_installed()\n"
+        "except SystemExit as exc:\n"
+        "    code = exc.code\n"
+        "assert code == 1, code\n"
+        "assert 'tkinter' not in sys.modules\n"
+        "assert not any(name.startswith('idlelib') for name in sys.modules)\n"
+    )
+    subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code],
+        check=True,
+        env={
+            **os.environ,
+            "HOME": str(tmp_path),
+            "USERPROFILE": str(tmp_path),
+            "PYTHONPATH": os.pathsep.join(sys.path),
+        },
+        capture_output=True,
+    )
+    assert not list(tmp_path.iterdir())
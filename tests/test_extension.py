@@ -0,0 +1,942 @@
+"""Test extension.py."""
+
+from __future__ import annotations
+
+# IDLE opens windows only after importing idlelib.editor, which calls
+# GetCurrentKeySet at import when it loads idlelib.mainmenu
+import idlelib.editor  # noqa: F401
+import json
+import os
+import re
+import sys
+import tkinter as tk
+from idlelib.config import IdleConf, IdleUserConfParser, idleConf
+from tkinter import TclError
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, cast
+
+import pytest
+
+import idleuserextend
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Generator
+    from idlelib.pyshell import PyShellEditorWindow
+    from pathlib import Path
+
+
+def test_get_mangled_dunder() -> None:
+    assert idleuserextend.get_mangled(3, "__init__") == "__init__"
+
+
+def test_get_mangled_regular() -> None:
+    assert idleuserextend.get_mangled(3, "pop") == "pop"
+
+
+def test_get_mangled() -> None:
+    assert idleuserextend.get_mangled(3, "__fish") == "_int__fish"
+
+
+def test_extension_bindings_cached_copy(fake_extension: str) -> None:
+    bindings = idleConf.GetExtensionBindings(fake_extension)
+    assert bindings == {"<<fake-event>>": ["<Control-Key-F11>"]}
+    bindings["<<fake-event>>"].append("<Key-F12>")
+    bindings["<<other>>"] = []
+    assert idleConf.GetExtensionBindings(fake_extension) == {
+        "<<fake-event>>": ["<Control-Key-F11>"],
+    }
+
+
+def test_extension_bindings_invalidated_by_set_option(
+    fake_extension: str,
+) -> None:
+    idleConf.GetExtensionBindings(fake_extension)
+    generation = idleuserextend.get_config_generation()
+    idleConf.SetOption(
+        "extensions",
+        f"{fake_extension}_bindings",
+        "fake-event",
+        "<Key-F12>",
+    )
+    assert idleuserextend.get_config_generation() > generation
+    assert idleConf.GetExtensionBindings(fake_extension) == {
+        "<<fake-event>>": ["<Key-F12>"],
+    }
+
+
+def test_unchanged_set_option_keeps_generation(fake_extension: str) -> None:
+    generation = idleuserextend.get_config_generation()
+    idleConf.SetOption(
+        "extensions",
+        f"{fake_extension}_bindings",
+        "fake-event",
+        "<Control-Key-F11>",
+    )
+    assert idleuserextend.get_config_generation() == generation
+
+
+def test_extension_keys_invalidated_by_remove_option(
+    fake_extension: str,
+) -> None:
+    user = idleConf.userCfg["extensions"]
+    user.SetOption(fake_extension, "enable", "True")
+    user.SetOption(f"{fake_extension}_cfgBindings", "fake-cfg", "<Key-F10>")
+    assert idleConf.GetExtensionKeys(fake_extension) == {
+        "<<fake-cfg>>": ["<Key-F10>"],
+    }
+    user.RemoveOption(f"{fake_extension}_cfgBindings", "fake-cfg")
+    assert idleConf.GetExtensionKeys(fake_extension) == {}
+
+
+def test_binding_index_user_only_events(fake_extension: str) -> None:
+    info = idleuserextend.get_binding_info(fake_extension)
+    assert info.default_events == frozenset()
+    assert info.user_events == frozenset({"fake-event"})
+    assert info.bindings == {"fake-event": ("<Control-Key-F11>",)}
+    assert idleuserextend.get_user_added_extension_bindings(
+        fake_extension,
+    ) == {"<<fake-event>>": ["<Control-Key-F11>"]}
+
+
+def test_binding_index_missing_extension() -> None:
+    info = idleuserextend.get_binding_info("IdleUserExtendMissingExt")
+    assert info is idleuserextend.EMPTY_BINDING_INFO
+    assert (
+        idleuserextend.get_raw_extension_keys(
+            "IdleUserExtendMissingExt",
+        )
+        == {}
+    )
+
+
+def test_load_cfg_files_skips_unchanged() -> None:
+    idleConf.LoadCfgFiles()
+    generation = idleuserextend.get_config_generation()
+    idleConf.LoadCfgFiles()
+    assert idleuserextend.get_config_generation() == generation
+
+
+def test_load_cfg_files_force() -> None:
+    idleConf.LoadCfgFiles()
+    generation = idleuserextend.get_config_generation()
+    idleuserextend.load_cfg_files(force=True)
+    assert idleuserextend.get_config_generation() > generation
+
+
+def test_load_parser_reloads_changed_file(tmp_path: Path) -> None:
+    path = tmp_path / "config-extensions.cfg"
+    path.write_text("[Ext]\nenable = True\n", encoding="utf-8")
+    parser = IdleUserConfParser(str(path))
+    assert idleuserextend.load_parser(parser)
+    assert not idleuserextend.load_parser(parser)
+    path.write_text("[Ext]\nenable = False\nextra = 1\n", encoding="utf-8")
+    assert idleuserextend.load_parser(parser)
+    assert parser.Get("Ext", "enable") == "False"
+
+
+def test_load_cfg_files_keeps_unsaved_changes(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    path = tmp_path / "config-test.cfg"
+    path.write_text("[Section]\noption = saved\n", encoding="utf-8")
+    parser = IdleUserConfParser(str(path))
+    idleuserextend.load_parser(parser)
+    idleuserextend.patch_user_parser("test", parser)
+    monkeypatch.setitem(idleConf.userCfg, "test", parser)
+    try:
+        parser.SetOption("Section", "option", "unsaved")
+        os.utime(path, ns=(0, 0))
+        idleConf.LoadCfgFiles()
+        assert parser.Get("Section", "option") == "unsaved"
+        assert idleuserextend.get_dirty_sections()["test"] == {"Section"}
+
+        # Forced reload discards unsaved changes
+        idleuserextend.load_cfg_files(force=True)
+        assert parser.Get("Section", "option") == "saved"
+        assert "test" not in idleuserextend.get_dirty_sections()
+    finally:
+        idleuserextend.unpatch_user_parser(parser)
+
+
+def test_ensure_initialized_creates_config() -> None:
+    idleuserextend.ensure_initialized()
+    assert idleConf.userCfg["extensions"].has_section("idleuserextend")
+    generation = idleuserextend.get_config_generation()
+    idleuserextend.ensure_initialized()
+    assert idleuserextend.get_config_generation() == generation
+
+
+def test_get_merged_section_user_over_default(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    parser = IdleUserConfParser(str(tmp_path / "config-extensions.cfg"))
+    parser.SetOption("ZzDummy", "z-text", "Y")
+    monkeypatch.setitem(idleConf.userCfg, "extensions", parser)
+    idleuserextend.bump_config_generation()
+
+    options = idleuserextend.get_merged_section("ZzDummy")
+    assert options["z-text"] == "Y"
+    assert options["enable_editor"] == "True"
+    assert idleuserextend.get_merged_section("ZzDummy") is options
+    assert idleuserextend.get_merged_section("idleuserextend-missing") == {}
+
+    parser.SetOption("ZzDummy", "z-text", "X")
+    idleuserextend.bump_config_generation()
+    assert idleuserextend.get_merged_section("ZzDummy")["z-text"] == "X"
+
+    # Stray % does not break the rest of the section
+    parser.read_string("[ZzDummy]\nnote = 100% done\n")
+    idleuserextend.bump_config_generation()
+    assert idleuserextend.get_merged_section("ZzDummy")["note"] == "100% done"
+    assert not idleuserextend.ensure_values_exist_in_section(
+        "ZzDummy",
+        {"z-text": "Z"},
+    )
+
+
+def test_binding_index_stray_percent(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    parser = IdleUserConfParser(str(tmp_path / "config-extensions.cfg"))
+    parser.read_string("[PctExt_bindings]\nev = <Key-5%>\n")
+    monkeypatch.setitem(idleConf.userCfg, "extensions", parser)
+    idleuserextend.bump_config_generation()
+    try:
+        # Stray % does not break bindings of other extensions
+        assert idleConf.GetExtensionBindings("ZzDummy")
+        assert idleConf.GetExtensionBindings("PctExt") == {
+            "<<ev>>": ["<Key-5%>"],
+        }
+    finally:
+        monkeypatch.undo()
+        idleuserextend.bump_config_generation()
+
+
+def test_get_extensions_matches_idlelib(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    parser = IdleUserConfParser(str(tmp_path / "config-extensions.cfg"))
+    parser.SetOption("ZzDummy", "enable", "True")
+    parser.SetOption("ZzDummy", "enable_shell", "invalid")
+    parser.SetOption("RegistryTestExt", "enable_editor", "False")
+    parser.SetOption("RegistryTestExt_cfgBindings", "test-event", "<Key-F8>")
+    parser.SetOption("DisabledTestExt", "enable", "False")
+    monkeypatch.setitem(idleConf.userCfg, "extensions", parser)
+    idleuserextend.bump_config_generation()
+
+    for kwargs in (
+        {"active_only": False},
+        {},
+        {"editor_only": True},
+        {"shell_only": True},
+    ):
+        assert idleConf.GetExtensions(**kwargs) == IdleConf.GetExtensions(
+            idleConf,
+            **kwargs,
+        )
+    registry = idleuserextend.get_extension_registry()
+    assert "DisabledTestExt" in registry.extensions
+    assert "RegistryTestExt" in registry.shell
+    assert "RegistryTestExt" not in registry.editor
+    assert idleuserextend.get_extension_registry() is registry
+
+
+def test_registered_extensions_applied_in_one_batch(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    parser = IdleUserConfParser(str(tmp_path / "config-extensions.cfg"))
+    parser.SetOption("RegisterTestExt1", "option", "user")
+    monkeypatch.setitem(idleConf.userCfg, "extensions", parser)
+    calls: list[str] = []
+    monkeypatch.setattr(
+        idleConf,
+        "SaveUserCfgFiles",
+        lambda: calls.append("save"),
+    )
+    monkeypatch.setattr(idleConf, "LoadCfgFiles", lambda: calls.append("load"))
+    # Applying is left to idle callback, which is not run
+    monkeypatch.setattr(idleuserextend.extension, "_tk_root", FakeRoot())
+    idleuserextend.bump_config_generation()
+
+    extensions = [
+        type(
+            f"RegisterTestExt{index}",
+            (),
+            {
+                "values": {"enable": "True", "option": str(index)},
+                "bind_defaults": {"test-event": f"<Key-F{index + 1}>"},
+            },
+        )
+        for index in range(3)
+    ]
+    try:
+        for extension in extensions:
+            idleuserextend.register_extension(extension)
+        idleuserextend.apply_registered_defaults()
+        assert calls == ["save", "load"]
+        assert [vars(extension)["option"] for extension in extensions] == [
+            "0",
+            "user",
+            "2",
+        ]
+        assert not hasattr(extensions[0], "enable")
+        assert parser.Get("RegisterTestExt0", "option") == "0"
+        assert parser.Get("RegisterTestExt1", "option") == "user"
+        assert (
+            parser.Get("RegisterTestExt2_cfgBindings", "test-event")
+            == "<Key-F3>"
+        )
+
+        # Nothing pending, nothing to do
+        idleuserextend.apply_registered_defaults()
+        assert calls == ["save", "load"]
+    finally:
+        for extension in extensions:
+            idleuserextend.unregister_extension(extension)
+
+
+@pytest.mark.usefixtures("no_default_root")
+def test_register_extension_without_default_root(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    extension_module = idleuserextend.extension
+    monkeypatch.setattr(extension_module, "_initialized", True)
+    parser = IdleUserConfParser(str(tmp_path / "config-extensions.cfg"))
+    monkeypatch.setitem(idleConf.userCfg, "extensions", parser)
+    monkeypatch.setattr(idleConf, "SaveUserCfgFiles", lambda: None)
+    monkeypatch.setattr(idleConf, "LoadCfgFiles", lambda: None)
+    idleuserextend.bump_config_generation()
+    extension = type(
+        "RegisterRootTestExt",
+        (),
+        {"values": {"option": "value"}},
+    )
+    try:
+        # Registered after initialization, root unknown
+        idleuserextend.register_extension(extension)
+        assert vars(extension)["option"] == "value"
+
+        # Root known from an editor window
+        root = FakeRoot()
+        monkeypatch.setattr(extension_module, "_tk_root", root)
+        del extension.option  # type: ignore[attr-defined]
+        parser.SetOption("RegisterRootTestExt", "option", "configured")
+        idleuserextend.bump_config_generation()
+        idleuserextend.register_extension(extension)
+        # Values are set right away, only saving waits for Tk
+        assert vars(extension)["option"] == "configured"
+        assert root.idle_callbacks
+        root.run_idle()
+        assert vars(extension)["option"] == "configured"
+    finally:
+        idleuserextend.unregister_extension(extension)
+
+
+def test_user_parser_dirty_tracking_atomic_save(tmp_path: Path) -> None:
+    path = tmp_path / "config-test.cfg"
+    parser = IdleUserConfParser(str(path))
+    idleuserextend.patch_user_parser("test", parser)
+    try:
+        assert parser.SetOption("Section", "option", "value")
+        assert idleuserextend.get_dirty_sections()["test"] == {"Section"}
+        parser.Save()
+        assert "test" not in idleuserextend.get_dirty_sections()
+        assert path.read_text() == "[Section]\noption = value\n\n"
+        assert [file.name for file in tmp_path.iterdir()] == [path.name]
+    finally:
+        idleuserextend.unpatch_user_parser(parser)
+
+
+def test_user_parser_tracking_keyword_arguments(tmp_path: Path) -> None:
+    parser = IdleUserConfParser(str(tmp_path / "config-test.cfg"))
+    idleuserextend.patch_user_parser("test", parser)
+    try:
+        parser.add_section("Section")
+        parser.set("Section", "option", value="1")
+        assert parser.get("Section", "option", raw=True) == "1"
+        assert idleuserextend.get_dirty_sections()["test"] == {"Section"}
+        parser.Save()
+    finally:
+        idleuserextend.unpatch_user_parser(parser)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX file modes")
+def test_atomic_save_new_file_mode(tmp_path: Path) -> None:
+    path = tmp_path / "config-test.cfg"
+    parser = IdleUserConfParser(str(path))
+    parser.SetOption("Section", "option", "value")
+    idleuserextend.write_user_parser(parser)
+    assert path.stat().st_mode & 0o777 == 0o666 & ~idleuserextend.get_umask()
+
+
+def test_batch_saves_coalesced(
+    fake_extension: str,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    saves: list[str] = []
+    parser = idleConf.userCfg["extensions"]
+    monkeypatch.setattr(parser, "Save", lambda: saves.append(parser.file))
+    with idleuserextend.batch_saves():
+        for value in ("1", "2", "3"):
+            idleConf.SetOption("extensions", fake_extension, "value", value)
+            idleConf.SaveUserCfgFiles()
+        assert not saves
+    assert saves == [parser.file]
+
+
+class FakeMenu:
+    """Stand-in for tkinter Menu holding command entries."""
+
+    def __init__(self, entries: list[tuple[str, str]]) -> None:
+        self.entries = [
+            {"label": label, "accelerator": accel} for label, accel in entries
+        ]
+        self.calls: list[str] = []
+
+    def index(self, index: str) -> int | None:
+        """Return position of entry matching escaped label pattern."""
+        self.calls.append("index")
+        if index == "end":
+            return len(self.entries) - 1 if self.entries else None
+        label = re.sub(r"\\(.)", r"\1", index)
+        for position, entry in enumerate(self.entries):
+            if entry["label"] == label:
+                return position
+        raise TclError(f'bad menu entry index "{index}"')
+
+    def type(self, index: int) -> str:
+        """Return entry type."""
+        self.calls.append("type")
+        return "command"
+
+    def entrycget(self, index: int, option: str) -> str:
+        """Return entry option value."""
+        self.calls.append("entrycget")
+        return self.entries[index][option]
+
+    def entryconfig(self, index: int, accelerator: str) -> None:
+        """Set entry accelerator."""
+        self.calls.append("entryconfig")
+        self.entries[index]["accelerator"] = accelerator
+
+
+class FakeText:
+    """Stand-in for tkinter Text recording virtual event changes."""
+
+    def __init__(self) -> None:
+        self.events: dict[str, list[str]] = {}
+
+    def event_add(self, virtual: str, *sequences: str) -> None:
+        """Bind virtual event to key sequences."""
+        self.events.setdefault(virtual, []).extend(sequences)
+
+    def event_delete(self, virtual: str, *sequences: str) -> None:
+        """Unbind virtual event from key sequences."""
+        keys = self.events.get(virtual, [])
+        for sequence in sequences:
+            if sequence in keys:
+                keys.remove(sequence)
+
+
+class FakeRoot:
+    """Stand-in for Tk root window that runs idle callbacks on demand."""
+
+    def __init__(self) -> None:
+        self.idle_callbacks: list[Callable[[], object]] = []
+
+    def after_idle(self, function: Callable[[], object]) -> None:
+        """Schedule function to be called when idle."""
+        self.idle_callbacks.append(function)
+
+    def run_idle(self) -> None:
+        """Call scheduled idle callbacks."""
+        callbacks = self.idle_callbacks
+        self.idle_callbacks = []
+        for function in callbacks:
+            function()
+
+
+@pytest.fixture
+def no_default_root(monkeypatch: pytest.MonkeyPatch) -> None:
+    # IDLE calls tkinter.NoDefaultRoot before creating its root
+    monkeypatch.setattr(tk, "_default_root", None, raising=False)
+    monkeypatch.setattr(idleuserextend.extension, "_tk_root", None)
+
+
+@pytest.mark.usefixtures("no_default_root")
+def test_schedule_initialization_uses_window_root(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    extension = idleuserextend.extension
+    monkeypatch.setattr(extension, "_initialization_scheduled", False)
+    depth = extension._save_batch_depth
+    idleuserextend.schedule_initialization()
+    assert extension._save_batch_depth == depth
+
+    root = FakeRoot()
+    idleuserextend.schedule_initialization(cast("tk.Misc", root))
+    idleuserextend.schedule_initialization(cast("tk.Misc", root))
+    assert len(root.idle_callbacks) == 1
+    assert extension._save_batch_depth == depth + 1
+    root.run_idle()
+    assert extension._save_batch_depth == depth
+
+
+class FakeEditorWindow:
+    """Stand-in for IDLE editor window."""
+
+    def __init__(
+        self,
+        default_keydefs: dict[str, list[str]],
+        menudefs: list[tuple[str, list[tuple[str, str] | None]]],
+        menudict: dict[str, FakeMenu],
+    ) -> None:
+        self.applied: list[dict[str, list[str]]] = []
+        self.root = FakeRoot()
+        self.text = FakeText()
+        self.mainmenu = SimpleNamespace(
+            default_keydefs=default_keydefs,
+            menudefs=menudefs,
+        )
+        self.menudict = menudict
+
+    def apply_bindings(self, keydefs: dict[str, list[str]]) -> None:
+        """Add events with keys to self.text."""
+        self.applied.append(keydefs)
+        for event, keylist in keydefs.items():
+            if keylist:
+                self.text.event_add(event, *keylist)
+
+
+def make_editwin(
+    default_keydefs: dict[str, list[str]],
+    menudefs: list[tuple[str, list[tuple[str, str] | None]]] | None = None,
+    menudict: dict[str, FakeMenu] | None = None,
+) -> tuple[PyShellEditorWindow, list[dict[str, list[str]]]]:
+    """Return stand-in editor window and list of bindings it applied."""
+    editwin = FakeEditorWindow(default_keydefs, menudefs or [], menudict or {})
+    return cast("PyShellEditorWindow", editwin), editwin.applied
+
+
+def test_keybinding_delta_shared_between_windows(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    calls: list[None] = []
+    get_key_set = idleConf.GetKeySet
+
+    def counting_get_key_set(keyset_name: str) -> dict[str, list[str]]:
+        calls.append(None)
+        return get_key_set(keyset_name)
+
+    monkeypatch.setattr(idleConf, "GetKeySet", counting_get_key_set)
+    idleuserextend.bump_config_generation()
+
+    baseline = {"<<idleuserextend-test>>": ["<Key-F9>"]}
+    first, first_applied = make_editwin(baseline)
+    second, second_applied = make_editwin(baseline)
+    idleuserextend.apply_keybindings_for_previous(first)
+    idleuserextend.apply_keybindings_for_previous(second)
+    assert first_applied[0] is second_applied[0]
+
+    # Baseline is now the shared keyset, nothing left to add
+    third, third_applied = make_editwin(first.mainmenu.default_keydefs)
+    idleuserextend.apply_keybindings_for_previous(third)
+    assert third_applied == [{}]
+    assert first.mainmenu.default_keydefs is third.mainmenu.default_keydefs
+    # Copies IDLE gets are made from the shared keyset
+    assert idleConf.GetCurrentKeySet() == idleuserextend.thaw_bindings(
+        first.mainmenu.default_keydefs,
+    )
+    assert len(calls) == 1
+
+
+def test_shared_keyset_is_read_only() -> None:
+    idleuserextend.bump_config_generation()
+    keyset = idleuserextend.get_shared_keyset()
+    assert keyset is idleuserextend.get_shared_keyset()
+    with pytest.raises(TypeError):
+        keyset["<<idleuserextend-test>>"] = ("<Key-F9>",)  # type: ignore[index]
+    assert all(isinstance(keys, tuple) for keys in keyset.values())
+
+    # Callers of GetCurrentKeySet get a copy they may modify
+    copy = idleConf.GetCurrentKeySet()
+    copy["<<idleuserextend-test>>"] = ["<Key-F9>"]
+    assert "<<idleuserextend-test>>" not in idleuserextend.get_shared_keyset()
+
+
+def test_freeze_keyset_shares_key_tuples() -> None:
+    keyset = idleuserextend.freeze_keyset(
+        {"<<first>>": ["<Key-F1>"], "<<second>>": ["<Key-F1>"]},
+    )
+    assert keyset["<<first>>"] is keyset["<<second>>"]
+
+
+def test_refresh_menu_accelerators_only_changed_entries() -> None:
+    menu = FakeMenu(
+        [("New File", "Ctrl+N"), ("Open*", "Ctrl+O"), ("Close", "Alt+F4")],
+    )
+    menudefs: list[tuple[str, list[tuple[str, str] | None]]] = [
+        (
+            "file",
+            [
+                ("_New File", "<<open-new-window>>"),
+                ("Open*", "<<open-window-from-file>>"),
+                None,
+                ("_Close", "<<close-window>>"),
+            ],
+        ),
+    ]
+    editwin, _ = make_editwin(
+        {
+            "<<open-new-window>>": ["<Control-Key-n>"],
+            "<<open-window-from-file>>": ["<Control-Key-p>"],
+            "<<close-window>>": ["<Alt-Key-F4>"],
+        },
+        menudefs,
+        {"file": menu},
+    )
+
+    idleuserextend.refresh_menu_accelerators(editwin, [])
+    assert menu.calls == []
+
+    idleuserextend.refresh_menu_accelerators(
+        editwin,
+        ["<<open-window-from-file>>", "<<close-window>>", "<<unknown>>"],
+    )
+    assert [entry["accelerator"] for entry in menu.entries] == [
+        "Ctrl+N",
+        "Ctrl+P",
+        "Alt+F4",
+    ]
+    assert menu.calls.count("entryconfig") == 1
+
+
+def test_find_binding_delta() -> None:
+    old = {
+        "<<kept>>": ["<Key-F1>"],
+        "<<rebound>>": ["<Key-F2>", "<Key-F3>"],
+        "<<removed>>": ["<Key-F4>"],
+    }
+    new = {
+        "<<kept>>": ["<Key-F1>"],
+        "<<rebound>>": ["<Key-F2>", "<Key-F5>"],
+        "<<added>>": ["<Key-F6>"],
+    }
+    delta = idleuserextend.find_binding_delta(new, old)
+    assert delta.added == {
+        "<<rebound>>": ["<Key-F5>"],
+        "<<added>>": ["<Key-F6>"],
+    }
+    assert delta.removed == {
+        "<<rebound>>": ["<Key-F3>"],
+        "<<removed>>": ["<Key-F4>"],
+    }
+    assert delta.changed == {"<<rebound>>": ["<Key-F2>", "<Key-F5>"]}
+    assert idleuserextend.find_added_bindings(new, old) == delta.added
+    assert idleuserextend.find_binding_delta(
+        idleuserextend.freeze_keyset(old),
+        old,
+    ) == idleuserextend.BindingDelta({}, {}, {})
+
+
+def test_apply_keybindings_removes_stale_bindings() -> None:
+    idleuserextend.bump_config_generation()
+    keyset = idleuserextend.get_shared_keyset()
+    baseline = idleuserextend.thaw_bindings(keyset)
+    baseline["<<idleuserextend-stale>>"] = ["<Key-F9>"]
+    editwin, _ = make_editwin(baseline)
+    editwin.text.event_add("<<idleuserextend-stale>>", "<Key-F9>")
+    idleuserextend.apply_keybindings_for_previous(editwin)
+    text = cast("FakeText", editwin.text)
+    assert text.events["<<idleuserextend-stale>>"] == []
+
+
+@pytest.mark.parametrize(
+    ("raw", "expected"),
+    [
+        ("True", ("bool", True)),
+        ("False", ("bool", False)),
+        ("12", ("int", 12)),
+        (" -3 ", ("int", -3)),
+        ("1_000", ("int", 1000)),
+        ("true", (None, "true")),
+        ("1.5", (None, "1.5")),
+        ("", (None, "")),
+    ],
+)
+def test_infer_option_type(
+    raw: str,
+    expected: tuple[str | None, bool | int | str],
+) -> None:
+    assert idleuserextend.infer_option_type(raw) == expected
+
+
+def test_option_schema_cached(fake_extension: str) -> None:
+    user = idleConf.userCfg["extensions"]
+    user.SetOption(fake_extension, "size", "3")
+    user.SetOption(fake_extension, "enable", "True")
+    schema = idleuserextend.get_option_schema(fake_extension)
+    assert list(schema) == ["enable", "size"]
+    assert schema["size"] == idleuserextend.OptionSchema(
+        name="size",
+        type="int",
+        default="3",
+        value=3,
+        source="user",
+        config_default=None,
+    )
+    assert idleuserextend.get_option_schema(fake_extension) is schema
+    user.SetOption(fake_extension, "size", "word")
+    assert (
+        idleuserextend.get_option_schema(fake_extension)["size"].type is None
+    )
+
+
+@pytest.fixture
+def stats() -> Generator[None, None, None]:
+    idleuserextend.reset_stats()
+    idleuserextend.enable_stats()
+    try:
+        yield
+    finally:
+        idleuserextend.disable_stats()
+        idleuserextend.reset_stats()
+
+
+@pytest.mark.usefixtures("stats")
+def test_stats_records_calls_and_cache_hits(fake_extension: str) -> None:
+    idleuserextend.bump_config_generation()
+    idleConf.GetExtensionKeys(fake_extension)
+    idleConf.GetExtensionKeys(fake_extension)
+
+    stats = idleuserextend.get_stats()["get_extension_keys"]
+    assert stats.calls == 2
+    assert stats.cache_hits == 1
+    assert stats.cache_misses == 1
+    assert stats.hit_rate == 0.5
+    assert stats.max_time <= stats.total_time
+    assert "get_extension_keys" in idleuserextend.format_stats()
+
+
+def test_disable_stats_restores_functions() -> None:
+    get_extension_keys = idleConf.GetExtensionKeys
+    load_extensions = idleuserextend.ExtPage.load_extensions
+    idleuserextend.enable_stats()
+    try:
+        assert idleuserextend.stats_enabled()
+        assert idleConf.GetExtensionKeys is not get_extension_keys
+    finally:
+        idleuserextend.disable_stats()
+        idleuserextend.reset_stats()
+    assert not idleuserextend.stats_enabled()
+    assert idleConf.GetExtensionKeys is get_extension_keys
+    assert idleuserextend.ExtPage.load_extensions is load_extensions
+
+
+def test_trace_records_bounded_chrome_trace(
+    fake_extension: str,
+    tmp_path: Path,
+) -> None:
+    get_extension_keys = idleConf.GetExtensionKeys
+    idleuserextend.reset_trace()
+    idleuserextend.enable_trace(size=3)
+    try:
+        idleuserextend.bump_config_generation()
+        for _ in range(4):
+            idleConf.GetExtensionKeys(fake_extension)
+        editwin, _ = make_editwin({"<<idleuserextend-test>>": ["<Key-F9>"]})
+        idleuserextend.apply_keybindings_for_previous(editwin)
+    finally:
+        idleuserextend.disable_trace()
+    assert not idleuserextend.trace_enabled()
+    assert idleConf.GetExtensionKeys is get_extension_keys
+
+    events = idleuserextend.get_trace()
+    assert [event.name for event in events] == [
+        "apply_binding_delta",
+        "refresh_menu_accelerators",
+        "apply_keybindings_for_previous",
+    ]
+    assert {event.details["window"] for event in events} == {id(editwin)}
+    assert events[0].details["added"] == len(
+        idleuserextend.get_shared_keyset(),
+    )
+
+    path = tmp_path / "trace.json"
+    idleuserextend.write_trace(str(path))
+    trace = json.loads(path.read_text(encoding="utf-8"))
+    assert [event["ph"] for event in trace["traceEvents"]] == ["X"] * 3
+    assert trace["traceEvents"][2]["cat"] == "window"
+    idleuserextend.reset_trace()
+    assert idleuserextend.get_trace() == []
+
+
+def test_trace_keeps_timers_when_stats_disabled() -> None:
+    get_extension_keys = idleConf.GetExtensionKeys
+    idleuserextend.enable_stats()
+    idleuserextend.enable_trace()
+    try:
+        idleuserextend.disable_stats()
+        assert idleConf.GetExtensionKeys is not get_extension_keys
+    finally:
+        idleuserextend.disable_trace()
+        idleuserextend.reset_stats()
+        idleuserextend.reset_trace()
+    assert idleConf.GetExtensionKeys is get_extension_keys
+
+
+@pytest.mark.parametrize(
+    ("sequence", "expected"),
+    [
+        ("<Control-Key-k>", "<Control-k>"),
+        ("<Shift-Control-KeyPress-k>", "<Control-Shift-k>"),
+        ("<Control-x><Control-Key-s>", "<Control-x><Control-s>"),
+        ("<Key-F5>", "<F5>"),
+        ("<Key-->", "<Key-->"),
+        ("a", "a"),
+    ],
+)
+def test_normalize_key_sequence(sequence: str, expected: str) -> None:
+    assert idleuserextend.normalize_key_sequence(sequence) == expected
+
+
+@pytest.fixture
+def conflicting_extension(fake_extension: str) -> str:
+    user = idleConf.userCfg["extensions"]
+    user.SetOption(fake_extension, "enable", "True")
+    user.SetOption(f"{fake_extension}_bindings", "fake-other", "<Control-F11>")
+    return fake_extension
+
+
+@pytest.mark.usefixtures("conflicting_extension")
+def test_key_index_finds_events_and_conflicts(
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    events = frozenset({"<<fake-event>>", "<<fake-other>>"})
+    assert idleuserextend.get_events_for_key("<Key-Control-F11>") == events
+    assert idleuserextend.get_key_conflicts()["<Control-F11>"] == events
+    assert idleuserextend.find_binding_conflicts(
+        {"<<new-event>>": ["<Control-Key-F11>", "<Control-Key-F10>"]},
+    ) == {"<Control-F11>": events | {"<<new-event>>"}}
+
+    idleuserextend.report_binding_conflicts({"<<fake-event>>": []})
+    idleuserextend.report_binding_conflicts({"<<new>>": ["<Control-F11>"]})
+    idleuserextend.report_binding_conflicts({"<<new>>": ["<Control-F11>"]})
+    assert capsys.readouterr().err.count("Key binding conflict") == 1
+
+
+def test_queued_keybindings_applied_once_per_batch() -> None:
+    idleuserextend.bump_config_generation()
+    baseline = {"<<idleuserextend-test>>": ["<Key-F9>"]}
+    windows = [make_editwin(baseline) for _ in range(3)]
+    root = FakeRoot()
+    # Like IDLE, windows share the idlelib.mainmenu module
+    mainmenu = windows[0][0].mainmenu
+    for editwin, _applied in windows:
+        editwin.root = root  # type: ignore[assignment]
+        editwin.mainmenu = mainmenu
+        idleuserextend.queue_keybindings(editwin)
+    assert len(root.idle_callbacks) == 1
+    assert not any(applied for _editwin, applied in windows)
+
+    closed, closed_applied = windows[1]
+    closed.text = None  # type: ignore[assignment]
+    root.run_idle()
+    assert not closed_applied
+    first_applied = windows[0][1]
+    last_applied = windows[2][1]
+    assert len(first_applied) == len(last_applied) == 1
+    assert first_applied[0] is last_applied[0]
+    assert first_applied[0]
+
+    idleuserextend.queue_keybindings(windows[0][0])
+    assert len(root.idle_callbacks) == 1
+    root.run_idle()
+
+
+def test_reapply_changed_config_updates_open_windows(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    path = tmp_path / "config-extensions.cfg"
+    path.write_text("", encoding="utf-8")
+    parser = IdleUserConfParser(str(path))
+    idleuserextend.load_parser(parser)
+    monkeypatch.setitem(idleConf.userCfg, "extensions", parser)
+    idleuserextend.bump_config_generation()
+    try:
+        editwin, applied = make_editwin(
+            idleuserextend.thaw_bindings(idleuserextend.get_shared_keyset()),
+        )
+        idleuserextend.apply_keybindings_for_previous(editwin)
+        assert not idleuserextend.reapply_changed_config()
+
+        path.write_text(
+            "[WatchTestExt]\nenable = True\n"
+            "[WatchTestExt_cfgBindings]\nwatch-event = <Control-Key-F7>\n",
+            encoding="utf-8",
+        )
+        assert idleuserextend.reapply_changed_config()
+        assert applied[-1] == {"<<watch-event>>": ["<Control-Key-F7>"]}
+        assert not idleuserextend.reapply_changed_config()
+
+        # Removing binding from file removes it from open windows
+        path.write_text("[WatchTestExt]\nenable = True\n", encoding="utf-8")
+        assert idleuserextend.reapply_changed_config()
+        assert idleuserextend.get_raw_extension_keys("WatchTestExt") == {}
+        assert "<<watch-event>>" not in idleConf.GetCurrentKeySet()
+        text = cast("FakeText", editwin.text)
+        assert text.events["<<watch-event>>"] == []
+    finally:
+        monkeypatch.undo()
+        idleuserextend.bump_config_generation()
+
+
+def test_binding_snapshot_cache(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    cache_path = tmp_path / "cache.marshal"
+    monkeypatch.setattr(
+        idleuserextend.extension,
+        "get_snapshot_cache_path",
+        lambda: str(cache_path),
+    )
+    config = tmp_path / "config-extensions.cfg"
+    config.write_text("[Ext_cfgBindings]\ne = <Key-F1>\n", encoding="utf-8")
+
+    def get_sources() -> tuple[tuple[str, tuple[int, int, int] | None], ...]:
+        return (
+            (str(config), idleuserextend.get_file_signature(str(config))),
+            (str(tmp_path / "missing.cfg"), None),
+        )
+
+    index = {
+        "Ext": idleuserextend.ExtensionBindingInfo(
+            {"e": ("<Key-F1>",)},
+            frozenset(),
+            frozenset({"e"}),
+            {},
+        ),
+    }
+    assert idleuserextend.load_binding_snapshot(get_sources()) is None
+    assert idleuserextend.save_binding_snapshot(index, get_sources())
+    assert idleuserextend.load_binding_snapshot(get_sources()) == index
+
+    # Same contents with a new signature is still valid
+    stat = config.stat()
+    os.utime(config, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert idleuserextend.load_binding_snapshot(get_sources()) == index
+
+    config.write_text("[Ext_cfgBindings]\ne = <Key-F2>\n", encoding="utf-8")
+    assert idleuserextend.load_binding_snapshot(get_sources()) is None
+
+    assert idleuserextend.save_binding_snapshot(index, get_sources())
+    cache_path.write_bytes(cache_path.read_bytes()[:-5])
+    assert idleuserextend.load_binding_snapshot(get_sources()) is None
@@ -0,0 +1,185 @@
+"""Test extpage.py."""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from idlelib.config import idleConf
+from typing import TYPE_CHECKING, cast
+
+import pytest
+
+import idleuserextend
+
+if TYPE_CHECKING:
+    from tkinter import StringVar
+
+
+class FakeStringVar:
+    """Stand-in for tkinter StringVar."""
+
+    def __init__(self, master: object = None) -> None:
+        self.value = ""
+
+    def get(self) -> str:
+        """Return value of variable."""
+        return self.value
+
+    def set(self, value: str) -> None:
+        """Set variable to value."""
+        self.value = value
+
+
+@pytest.fixture
+def ext_page(monkeypatch: pytest.MonkeyPatch) -> idleuserextend.ExtPage:
+    monkeypatch.setattr(idleuserextend.extpage, "StringVar", FakeStringVar)
+    idleuserextend.ensure_initialized()
+    page = idleuserextend.ExtPage.__new__(idleuserextend.ExtPage)
+    page.ext_defaultCfg = idleConf.defaultCfg["extensions"]
+    page.ext_userCfg = idleConf.userCfg["extensions"]
+    page.load_extensions()
+    return page
+
+
+def test_ext_page_loads_options_lazily(
+    ext_page: idleuserextend.ExtPage,
+) -> None:
+    assert "idleuserextend" in ext_page.extensions
+    assert not any(ext_page.extensions.values())
+    ext_page.load_extension_options("idleuserextend")
+    options = ext_page.extensions["idleuserextend"]
+    assert [option["name"] for option in options][:3] == [
+        "enable",
+        "enable_editor",
+        "enable_shell",
+    ]
+    assert options[0]["type"] == "bool"
+    assert ext_page.loaded_extensions == {"idleuserextend"}
+
+
+def test_set_extension_value_keeps_user_only_option(
+    ext_page: idleuserextend.ExtPage,
+) -> None:
+    # ZzDummy is defined in the default configuration
+    user = idleConf.userCfg["extensions"]
+    user.SetOption("ZzDummy", "idleuserextend_test", "3")
+    try:
+        ext_page.load_extension_options("ZzDummy")
+        (option,) = (
+            option
+            for option in ext_page.extensions["ZzDummy"]
+            if option["name"] == "idleuserextend_test"
+        )
+        assert not ext_page.set_extension_value("ZzDummy", option)
+        assert user.Get("ZzDummy", "idleuserextend_test") == "3"
+    finally:
+        user.RemoveOption("ZzDummy", "idleuserextend_test")
+
+
+def test_save_all_changed_extensions_only_changed(
+    fake_extension: str,
+    ext_page: idleuserextend.ExtPage,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    saves: list[None] = []
+    user = idleConf.userCfg["extensions"]
+    monkeypatch.setattr(user, "Save", lambda: saves.append(None))
+    user.SetOption(fake_extension, "size", "3")
+    user.SetOption(fake_extension, "word", "fish")
+    ext_page.extensions[fake_extension] = []
+    ext_page.load_extension_options(fake_extension)
+    ext_page.loaded_extensions = {fake_extension}
+
+    ext_page.save_all_changed_extensions()
+    assert not saves
+
+    size, _word = ext_page.extensions[fake_extension]
+    var = cast("FakeStringVar", size["var"])
+    var.set("4")
+    ext_page.save_all_changed_extensions()
+    assert saves == [None]
+    assert user.Get(fake_extension, "size") == "4"
+
+    ext_page.save_all_changed_extensions()
+    assert saves == [None]
+
+
+EXT_PAGE_PATCH_CODE = """
+import sys
+import idleuserextend
+idleuserextend.idleuserextend
+assert "idlelib.configdialog" not in sys.modules
+{before}
+from idlelib import configdialog
+{after}
+"""
+
+
+@pytest.mark.parametrize(
+    ("before", "after"),
+    [
+        ("", "assert configdialog.ExtPage is idleuserextend.ExtPage"),
+        (
+            "",
+            (
+                "idleuserextend.idleuserextend.on_reloading(None)\n"
+                "from idleuserextend.extpage import original_ext_page\n"
+                "assert configdialog.ExtPage is original_ext_page"
+            ),
+        ),
+        (
+            "idleuserextend.idleuserextend.on_reloading(None)",
+            "assert configdialog.ExtPage.__module__ == configdialog.__name__",
+        ),
+    ],
+)
+def test_ext_page_patched_when_configdialog_imported(
+    before: str,
+    after: str,
+) -> None:
+    subprocess.run(  # noqa: S603
+        [
+            sys.executable,
+            "-c",
+            EXT_PAGE_PATCH_CODE.format(before=before, after=after),
+        ],
+        check=True,
+        capture_output=True,
+    )
+
+
+def test_extension_option_dict_access() -> None:
+    var = FakeStringVar()
+    var.set("3")
+    option = idleuserextend.ExtensionOption(
+        "size",
+        "int",
+        "3",
+        3,
+        cast("StringVar", var),
+    )
+    assert option["name"] == "size"
+    assert option["type"] == "int"
+    assert option["default"] == "3"
+    assert option["value"] == 3
+    assert option["var"] is option.var
+    assert "var" in option
+    assert "snapshot" not in option
+    with pytest.raises(KeyError):
+        option["snapshot"]
+    option["value"] = 4
+    assert option.value == 4
+    assert option.get("value") == 4
+    assert option.get("snapshot", "missing") == "missing"
+    assert dict(option) == {
+        "name": "size",
+        "type": "int",
+        "default": "3",
+        "value": 4,
+        "var": option.var,
+    }
+    assert not hasattr(option, "__dict__")
+
+    assert not option.is_changed()
+    var.set("4")
+    assert option.is_changed()
@@ -1,5 +1,12 @@
 """Test __init__.py."""
 
+from __future__ import annotations
+
+import subprocess
+import sys
+
+import pytest
+
 import idleuserextend
 
 assert hasattr(idleuserextend, "idleuserextend")
@@ -10,13 +17,18 @@ assert callable(
 )
 
 
-def test_get_mangled_dunder() -> None:
-    assert idleuserextend.get_mangled(3, "__init__") == "__init__"
-
-
-def test_get_mangled_regular() -> None:
-    assert idleuserextend.get_mangled(3, "pop") == "pop"
-
-
-def test_get_mangled() -> None:
-    assert idleuserextend.get_mangled(3, "__fish") == "_int__fish"
+@pytest.mark.parametrize("submodule", ["extension", "extpage", "check"])
+def test_submodule_attribute_access(submodule: str) -> None:
+    subprocess.run(  # noqa: S603
+        [
+            sys.executable,
+            "-c",
+            (
+                "import idleuserextend\n"
+                f"assert idleuserextend.{submodule}.__name__"
+                f" == 'idleuserextend.{submodule}'"
+            ),
+        ],
+        check=True,
+        capture_output=True,
+    )
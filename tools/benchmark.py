@@ -0,0 +1,477 @@
+"""Benchmark the configuration and keybinding paths idleuserextend patches.
+
+Generates synthetic config-extensions.def and config-extensions.cfg
+files with a given number of extensions, swaps them in for the loaded
+extensions configuration, and times the patched functions. Tk dependent
+parts run against stand-in menu and editor window objects, so no
+display is needed.
+
+Results are printed as JSON, and can be compared against the results of
+a previous run to catch regressions.
+"""
+
+# Programmed by CoolCat467
+
+from __future__ import annotations
+
+import argparse
+
+# Import IDLE modules that read configuration at import before
+# synthetic configuration is swapped in, like IDLE does at startup
+import idlelib.editor  # noqa: F401
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from idlelib.config import IdleConfParser, IdleUserConfParser, idleConf
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, cast
+
+import idleuserextend
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Generator
+    from idlelib.pyshell import PyShellEditorWindow
+
+DEFAULT_SIZES = (10, 100, 1000, 5000)
+
+# GetExtensions removes these, so they must exist in default config.
+FORMER_EXTENSIONS = (
+    "AutoComplete",
+    "CodeContext",
+    "FormatParagraph",
+    "ParenMatch",
+)
+
+
+def extension_name(index: int) -> str:
+    """Return name of synthetic extension index."""
+    return f"BenchExt{index:05d}"
+
+
+def write_synthetic_configs(directory: str, count: int) -> tuple[str, str]:
+    """Write synthetic extension configs with count extensions.
+
+    Even extensions are defined in the default config, with user
+    overrides for every fourth one. Odd extensions only exist in the
+    user config. Every extension has configurable and non-configurable
+    bindings, and every user extension has user-only bindings.
+
+    Return (default config path, user config path).
+    """
+    default_lines: list[str] = []
+    user_lines: list[str] = []
+    for name in FORMER_EXTENSIONS:
+        default_lines.append(f"[{name}]\nenable = True\n")
+    for index in range(count):
+        name = extension_name(index)
+        lines = default_lines if index % 2 == 0 else user_lines
+        lines.append(
+            f"[{name}]\n"
+            "enable = True\n"
+            "enable_editor = True\n"
+            "enable_shell = False\n"
+            f"size = {index}\n"
+            "word = fish\n",
+        )
+        lines.append(
+            f"[{name}_cfgBindings]\n"
+            f"{name.lower()}-action = <Control-Alt-Key-{index % 10}>\n",
+        )
+        lines.append(
+            f"[{name}_bindings]\n"
+            f"{name.lower()}-other = <Control-Shift-Key-F{index % 12 + 1}>\n",
+        )
+        if index % 4 == 0:
+            user_lines.append(f"[{name}]\nsize = {index + 1}\n")
+            user_lines.append(
+                f"[{name}_cfgBindings]\n"
+                f"{name.lower()}-action = <Alt-Key-{index % 10}>\n",
+            )
+        if index % 2 == 1:
+            user_lines.append(
+                f"[{name}_bindings]\n"
+                f"{name.lower()}-user = <Shift-Key-F{index % 12 + 1}>\n",
+            )
+
+    default_path = os.path.join(directory, "config-extensions.def")
+    user_path = os.path.join(directory, "config-extensions.cfg")
+    with open(default_path, "w", encoding="utf-8") as file:
+        file.write("\n".join(default_lines))
+    with open(user_path, "w", encoding="utf-8") as file:
+        file.write("\n".join(user_lines))
+    return default_path, user_path
+
+
+@contextmanager
+def synthetic_extensions(count: int) -> Generator[list[str], None, None]:
+    """Swap in synthetic extension configs, yield extension names."""
+    old_default = idleConf.defaultCfg["extensions"]
+    old_user = idleConf.userCfg["extensions"]
+    with tempfile.TemporaryDirectory() as directory:
+        default_path, user_path = write_synthetic_configs(directory, count)
+        default = IdleConfParser(default_path)
+        user = IdleUserConfParser(user_path)
+        default.Load()
+        user.Load()
+        idleuserextend.patch_user_parser("extensions", user)
+        idleConf.defaultCfg["extensions"] = default
+        idleConf.userCfg["extensions"] = user
+        # Keep binding snapshot cache out of the real user directory
+        extension = idleuserextend.extension
+        get_cache_path = extension.get_snapshot_cache_path
+        cache_path = os.path.join(directory, "cache.marshal")
+        extension.get_snapshot_cache_path = lambda: cache_path
+        idleuserextend.bump_config_generation()
+        try:
+            yield [extension_name(index) for index in range(count)]
+        finally:
+            extension.get_snapshot_cache_path = get_cache_path
+            idleConf.defaultCfg["extensions"] = old_default
+            idleConf.userCfg["extensions"] = old_user
+            idleuserextend.unpatch_user_parser(user)
+            idleuserextend.bump_config_generation()
+
+
+class StandInStringVar:
+    """Stand-in for tkinter StringVar."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, master: object = None) -> None:
+        """Initialize empty variable."""
+        self.value = ""
+
+    def get(self) -> str:
+        """Return value of variable."""
+        return self.value
+
+    def set(self, value: str) -> None:
+        """Set variable to value."""
+        self.value = value
+
+
+class StandInMenu:
+    """Stand-in for tkinter Menu with command entries."""
+
+    __slots__ = ("entries",)
+
+    def __init__(self, labels: list[str]) -> None:
+        """Initialize menu with one command entry per label."""
+        self.entries = [
+            {"label": label, "accelerator": "Ctrl+X"} for label in labels
+        ]
+
+    def index(self, index: str) -> int | None:
+        """Return position of entry for index."""
+        if index == "end":
+            return len(self.entries) - 1 if self.entries else None
+        label = index.replace("\\", "")
+        for position, entry in enumerate(self.entries):
+            if entry["label"] == label:
+                return position
+        return None
+
+    def type(self, index: int) -> str:
+        """Return entry type."""
+        return "command"
+
+    def entrycget(self, index: int, option: str) -> str:
+        """Return entry option value."""
+        return self.entries[index][option]
+
+    def entryconfig(self, index: int, accelerator: str) -> None:
+        """Set entry accelerator."""
+        self.entries[index]["accelerator"] = accelerator
+
+
+class StandInText:
+    """Stand-in for tkinter Text virtual event methods."""
+
+    __slots__ = ()
+
+    def event_add(self, virtual: str, *sequences: str) -> None:
+        """Bind virtual event to key sequences."""
+
+    def event_delete(self, virtual: str, *sequences: str) -> None:
+        """Unbind virtual event from key sequences."""
+
+
+class StandInEditorWindow:
+    """Stand-in for IDLE editor window."""
+
+    __slots__ = ("__weakref__", "mainmenu", "menudict", "text")
+
+    def __init__(
+        self,
+        default_keydefs: dict[str, list[str]],
+        menudefs: list[tuple[str, list[tuple[str, str] | None]]],
+    ) -> None:
+        """Initialize window with one menu per menudefs group."""
+        self.text = StandInText()
+        self.mainmenu = SimpleNamespace(
+            default_keydefs=default_keydefs,
+            menudefs=menudefs,
+        )
+        self.menudict = {
+            title: StandInMenu(
+                [item[0] for item in items if item is not None],
+            )
+            for title, items in menudefs
+        }
+
+    def apply_bindings(self, keydefs: dict[str, list[str]]) -> None:
+        """Add events with keys to self.text."""
+        for event, keylist in keydefs.items():
+            if keylist:
+                self.text.event_add(event, *keylist)
+
+
+def make_menudefs(
+    keyset: dict[str, list[str]],
+) -> list[tuple[str, list[tuple[str, str] | None]]]:
+    """Return menudefs with one entry per event, ten entries per menu."""
+    events = sorted(keyset)
+    return [
+        (
+            f"menu{start // 10}",
+            [
+                (event.strip("<>"), event)
+                for event in events[start : start + 10]
+            ],
+        )
+        for start in range(0, len(events), 10)
+    ]
+
+
+def make_editwin(
+    baseline: dict[str, list[str]],
+    menudefs: list[tuple[str, list[tuple[str, str] | None]]],
+) -> PyShellEditorWindow:
+    """Return stand-in editor window typed as an IDLE editor window."""
+    return cast(
+        "PyShellEditorWindow",
+        StandInEditorWindow(baseline, menudefs),
+    )
+
+
+def time_call(
+    function: Callable[[], object],
+    repeat: int,
+    setup: Callable[[], object] | None = None,
+) -> list[float]:
+    """Return seconds taken by each of repeat calls of function."""
+    times: list[float] = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run_size(count: int, repeat: int) -> list[dict[str, object]]:
+    """Return benchmark results for configs with count extensions."""
+    results: list[dict[str, object]] = []
+
+    def record(
+        name: str,
+        function: Callable[[], object],
+        setup: Callable[[], object] | None = None,
+    ) -> None:
+        times = time_call(function, repeat, setup)
+        results.append(
+            {
+                "name": name,
+                "extensions": count,
+                "repeat": repeat,
+                "min": min(times),
+                "median": statistics.median(times),
+                "mean": statistics.fmean(times),
+                "max": max(times),
+            },
+        )
+
+    with synthetic_extensions(count) as names:
+
+        def call_all(function: Callable[[str], object]) -> None:
+            for name in names:
+                function(name)
+
+        invalidate = idleuserextend.bump_config_generation
+
+        record(
+            "load_cfg_files[force]",
+            lambda: idleuserextend.load_cfg_files(force=True),
+        )
+        record("load_cfg_files[unchanged]", idleuserextend.load_cfg_files)
+        record(
+            "get_raw_extension_keys[cold]",
+            lambda: call_all(idleuserextend.get_raw_extension_keys),
+            invalidate,
+        )
+        record(
+            "get_raw_extension_keys[warm]",
+            lambda: call_all(idleuserextend.get_raw_extension_keys),
+        )
+        record(
+            "get_extension_keys[cold]",
+            lambda: call_all(idleuserextend.get_extension_keys),
+            invalidate,
+        )
+        record(
+            "get_extension_keys[warm]",
+            lambda: call_all(idleuserextend.get_extension_keys),
+        )
+        record(
+            "get_extension_bindings[cold]",
+            lambda: call_all(idleuserextend.get_extension_bindings),
+            invalidate,
+        )
+        record(
+            "get_extension_bindings[warm]",
+            lambda: call_all(idleuserextend.get_extension_bindings),
+        )
+
+        keyset = idleConf.GetCurrentKeySet()
+        # Baseline missing every third event and with every fifth rebound
+        baseline = {
+            event: ["<Key-F13>"] if index % 5 == 0 else list(keys)
+            for index, (event, keys) in enumerate(keyset.items())
+            if index % 3
+        }
+        record(
+            "find_added_bindings",
+            lambda: idleuserextend.find_added_bindings(keyset, baseline),
+        )
+
+        page = idleuserextend.ExtPage.__new__(idleuserextend.ExtPage)
+        page.ext_defaultCfg = idleConf.defaultCfg["extensions"]
+        page.ext_userCfg = idleConf.userCfg["extensions"]
+        string_var = idleuserextend.extpage.StringVar
+        idleuserextend.extpage.StringVar = StandInStringVar
+        try:
+            record("ExtPage.load_extensions", page.load_extensions)
+            record(
+                "ExtPage.load_extension_options[all]",
+                lambda: call_all(page.load_extension_options),
+                page.load_extensions,
+            )
+        finally:
+            idleuserextend.extpage.StringVar = string_var
+
+        menudefs = make_menudefs(keyset)
+        record(
+            "apply_keybindings_for_previous[cold]",
+            lambda: idleuserextend.apply_keybindings_for_previous(
+                make_editwin(dict(baseline), menudefs),
+            ),
+            invalidate,
+        )
+        shared_baseline = dict(baseline)
+        idleuserextend.apply_keybindings_for_previous(
+            make_editwin(shared_baseline, menudefs),
+        )
+        record(
+            "apply_keybindings_for_previous[shared]",
+            lambda: idleuserextend.apply_keybindings_for_previous(
+                make_editwin(shared_baseline, menudefs),
+            ),
+        )
+    return results
+
+
+def compare(
+    results: list[dict[str, object]],
+    previous: list[dict[str, object]],
+    threshold: float,
+) -> list[str]:
+    """Return descriptions of results slower than previous by threshold."""
+    old = {
+        (str(result["name"]), str(result["extensions"])): result
+        for result in previous
+    }
+    regressions: list[str] = []
+    for result in results:
+        key = (str(result["name"]), str(result["extensions"]))
+        if key not in old:
+            continue
+        before = float(cast("float", old[key]["median"]))
+        after = float(cast("float", result["median"]))
+        if before and after / before > threshold:
+            regressions.append(
+                f"{key[0]} ({key[1]} extensions): "
+                f"{before * 1e3:.3f} ms -> {after * 1e3:.3f} ms",
+            )
+    return regressions
+
+
+def main(argv: list[str]) -> int:
+    """Run benchmarks and print JSON results. Return exit code."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SIZES),
+        help="numbers of synthetic extensions to benchmark",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="times each benchmark is run",
+    )
+    parser.add_argument(
+        "--output",
+        help="write JSON results to this file instead of stdout",
+    )
+    parser.add_argument(
+        "--compare",
+        help="JSON results of a previous run to check for regressions",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="median slowdown ratio counted as regression (default 1.25)",
+    )
+    args = parser.parse_args(argv)
+
+    results: list[dict[str, object]] = []
+    for count in args.sizes:
+        results.extend(run_size(count, args.repeat))
+
+    report = {
+        "idleuserextend": idleuserextend.__version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "unit": "seconds",
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            previous = json.load(file)["results"]
+        regressions = compare(results, previous, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main(sys.argv[1:]))